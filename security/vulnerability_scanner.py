@@ -7,27 +7,2744 @@ Integrates multiple security scanning tools for comprehensive vulnerability asse
 import os
 import sys
 import json
+import asyncio
+import signal
 import subprocess
 import argparse
 import threading
 import queue
 import time
+import cProfile
+import pstats
+import tracemalloc
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import xml.etree.ElementTree as ET
 import requests
+from requests.adapters import HTTPAdapter
 import re
+import shutil
+import socket
+import ipaddress
+import hashlib
+import fnmatch
+import ssl
+import mmap
+import random
+import sqlite3
+import string
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from itertools import chain, islice
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, urljoin, parse_qsl, urlunparse, quote
+from html import escape
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default cap on concurrent invocations of each tool across all targets in a batch
+DEFAULT_TOOL_LIMITS = {
+    'nmap': 2,
+    'nikto': 2,
+    'testssl': 2,
+    'nuclei': 2,
+    'gobuster': 2,
+    'dirfuzz': 2
+}
+
+# Timeout per tool in seconds when there is not enough runtime history
+DEFAULT_TOOL_TIMEOUTS = {
+    'nmap': 600,
+    'nikto': 900,
+    'testssl': 600,
+    'nuclei': 1200,
+    'gobuster': 600,
+    'dirfuzz': 600
+}
+
+# Built-in scan profiles. Per tool: extra command-line args, timeout,
+# concurrency (threads/connections), estimated cost in seconds and a
+# relative value used to choose checks under --time-budget. Tools missing
+# from a profile are not run.
+SCAN_PROFILES = {
+    'quick': {
+        'description': 'Top ports, high-severity templates and a short wordlist run',
+        'tools': {
+            'header_check': {'cost': 5, 'value': 3},
+            'sql_check': {'cost': 30, 'value': 5},
+            'nmap': {'args': ['-sV', '-T4', '--top-ports', '1000'], 'cost': 120, 'value': 6},
+            'nikto': {'args': ['-Tuning', '12'], 'cost': 300, 'value': 4},
+            'testssl': {'cost': 120, 'value': 5},
+            'nuclei': {'args': ['-severity', 'critical,high'], 'cost': 300, 'value': 9},
+            'gobuster': {'concurrency': 10, 'cost': 120, 'value': 3},
+            'dirfuzz': {'concurrency': 10, 'cost': 120, 'value': 3}
+        }
+    },
+    'full': {
+        'description': 'Service and vulnerability scripts, all nikto tuning and template severities',
+        'tools': {
+            'header_check': {'cost': 5, 'value': 3},
+            'sql_check': {'cost': 60, 'value': 5},
+            'nmap': {'args': ['-sV', '-sC', '-O', '-A', '--script', 'vuln,exploit,auth,default'],
+                     'cost': 480, 'value': 7},
+            'nikto': {'args': ['-Tuning', '123456789'], 'cost': 720, 'value': 5},
+            'testssl': {'cost': 300, 'value': 5},
+            'nuclei': {'args': ['-severity', 'critical,high,medium,low'], 'cost': 900, 'value': 9},
+            'gobuster': {'concurrency': 50, 'cost': 300, 'value': 4},
+            'dirfuzz': {'concurrency': 50, 'cost': 300, 'value': 4}
+        }
+    }
+}
+
+# Version probe for each external tool
+TOOL_PROBES = {
+    'nmap': ['nmap', '--version'],
+    'nikto': ['nikto', '-Version'],
+    'sqlmap': ['sqlmap', '--version'],
+    'gobuster': ['gobuster', 'version'],
+    'testssl': ['testssl', '--version'],
+    'nuclei': ['nuclei', '-version'],
+    'rustscan': ['rustscan', '--version'],
+    'ffuf': ['ffuf', '-V']
+}
+
+# Per-user cache directory for state shared between runs
+CACHE_DIR = os.environ.get(
+    'VULN_SCANNER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'vulnerability_scanner')
+)
+
+def normalize_target(target: str) -> str:
+    """Prepend https:// to bare IPs and hostnames"""
+    target = target.strip()
+    if not target.startswith(('http://', 'https://')):
+        target = f"https://{target}"
+    return target
+
+def nmap_host(target: str) -> str:
+    """Strip scheme, port and path from a URL target so nmap can use it, keeping CIDR suffixes"""
+    if '://' not in target:
+        return target
+    rest = target.split('://', 1)[1]
+    netloc, _, path = rest.partition('/')
+    prefix = path.split('/', 1)[0]
+    try:
+        # Bare IPv6 addresses have no brackets to tell them from a port
+        host = str(ipaddress.ip_address(netloc))
+    except ValueError:
+        host = urlparse(f"//{netloc}").hostname or netloc
+    if prefix.isdigit():
+        return f"{host}/{prefix}"
+    return host
+
+def split_port_range(ports: str, chunks: int) -> List[str]:
+    """Split an nmap port range like 1-65535 into contiguous sub-ranges"""
+    first, _, last = ports.partition('-')
+    first, last = int(first), int(last or first)
+    size = max(1, -(-(last - first + 1) // chunks))
+    return [
+        f"{start}-{min(start + size - 1, last)}"
+        for start in range(first, last + 1, size)
+    ]
+
+# Largest network split into nmap shards (a /16 in IPv4); bigger ranges,
+# e.g. an IPv6 /64, would expand into more shards than could ever be scanned
+MAX_SHARDED_ADDRESSES = 65536
+
+def split_hosts(hosts: str, shard_size: int) -> List[List[str]]:
+    """Split a CIDR range or comma/space separated host list into shards"""
+    entries = [h for h in re.split(r'[,\s]+', hosts) if h]
+    addresses = []
+    for entry in entries:
+        try:
+            network = ipaddress.ip_network(entry, strict=False)
+        except ValueError:
+            addresses.append(entry)
+            continue
+        if network.num_addresses > MAX_SHARDED_ADDRESSES:
+            raise ValueError(
+                f"{entry} has {network.num_addresses} addresses; nmap sharding supports at most "
+                f"{MAX_SHARDED_ADDRESSES} per network (use a longer prefix or --nmap-shard-by ports)"
+            )
+        if network.num_addresses == 1:
+            addresses.append(str(network.network_address))
+        elif network.num_addresses <= shard_size:
+            addresses.append(str(network))
+        else:
+            # Carve large networks into subnets no bigger than a shard
+            new_prefix = network.max_prefixlen - (shard_size.bit_length() - 1)
+            addresses.extend(str(subnet) for subnet in network.subnets(new_prefix=new_prefix))
+            
+    shards, current, current_size = [], [], 0
+    for address in addresses:
+        size = ipaddress.ip_network(address, strict=False).num_addresses if '/' in address else 1
+        if current and current_size + size > shard_size:
+            shards.append(current)
+            current, current_size = [], 0
+        current.append(address)
+        current_size += size
+    if current:
+        shards.append(current)
+    return shards
+
+# Payloads sent to every discovered parameter by the SQL injection check
+SQL_TEST_PAYLOADS = [
+    "'", '"', "' OR '1'='1", '" OR "1"="1',
+    "' OR '1'='1' --", "' OR '1'='1' #",
+    "1' ORDER BY 1--", "1' UNION SELECT NULL--"
+]
+
+# Database error signatures indicating a payload reached the SQL layer
+SQL_ERROR_SIGNATURES = [
+    'mysql_fetch', 'Warning: mysql', 'MySqlException',
+    'valid MySQL result', 'mssql_query()', 'MySqlClient',
+    'PostgreSQL', 'valid PostgreSQL result',
+    'Warning: pg_', 'PG::SyntaxError',
+    'SQLite error', 'sqlite3.OperationalError',
+    'Microsoft OLE DB Provider for ODBC Drivers',
+    'Microsoft OLE DB Provider for SQL Server',
+    'Incorrect syntax near', 'Sintaxis incorrecta cerca de'
+]
+
+# All signatures as one case-insensitive alternation, matched in a single pass
+SQL_ERROR_PATTERN = re.compile(
+    '|'.join(re.escape(signature) for signature in SQL_ERROR_SIGNATURES),
+    re.IGNORECASE
+)
+
+# Directory fuzzing defaults
+DEFAULT_WORDLIST = "/usr/share/wordlists/dirb/common.txt"
+FALLBACK_WORDS = [
+    'admin', 'administrator', 'backup', 'config', 'dashboard',
+    'debug', 'test', 'temp', 'tmp', 'upload', 'uploads',
+    '.git', '.env', '.config', 'wp-admin', 'phpmyadmin'
+]
+FUZZ_EXTENSIONS = ['php', 'asp', 'aspx', 'jsp', 'html', 'js', 'txt', 'xml', 'json']
+
+# Paths worth reporting when discovered, checked in order
+SENSITIVE_PATH_PATTERNS = [
+    ('.git', 'Git Repository Exposed', 'CRITICAL'),
+    ('.env', 'Environment File Exposed', 'CRITICAL'),
+    ('backup', 'Backup Files/Directory', 'HIGH'),
+    ('admin', 'Admin Interface Exposed', 'HIGH'),
+    ('config', 'Configuration Files', 'HIGH'),
+    ('debug', 'Debug Information', 'MEDIUM'),
+    ('test', 'Test Files/Directory', 'LOW')
+]
+
+# Severity ranking, most severe first
+SEVERITY_ORDER = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3, 'INFO': 4}
+
+# Finding fields that identify what a finding is about, beyond tool/type/host
+IDENTITY_FIELDS = ['port', 'service', 'path', 'header', 'script', 'template',
+                   'vulnerability', 'parameter', 'payload']
+
+# Core finding fields, stored as slots on Finding; anything else goes in extra
+FINDING_FIELDS = ('tool', 'type', 'severity', 'host', 'description',
+                  'recommendation', 'name') + tuple(IDENTITY_FIELDS)
+
+# Low-cardinality fields whose values repeat across findings and get interned
+INTERNED_FIELDS = ('tool', 'type', 'severity', 'host', 'service', 'header',
+                   'script', 'template', 'name')
+
+# Canonical vulnerability identifiers used to correlate findings across tools
+CVE_PATTERN = re.compile(r'CVE-\d{4}-\d{4,}', re.IGNORECASE)
+CWE_PATTERN = re.compile(r'CWE-(\d+)', re.IGNORECASE)
+
+# Fields searched for CVE ids, including ones a tool puts outside the core fields
+CVE_FIELDS = ('cve', 'reference', 'references', 'template', 'name',
+              'vulnerability', 'script', 'description')
+
+def finding_fingerprint(vuln: Dict) -> str:
+    """Stable hash identifying a finding across runs"""
+    parts = [vuln.get('tool', ''), vuln.get('type', ''), vuln.get('host', '')]
+    parts.extend(str(vuln.get(field, '')) for field in IDENTITY_FIELDS)
+    parts.append(vuln.get('description', ''))
+    return hashlib.sha1('\x1f'.join(parts).encode('utf-8', errors='replace')).hexdigest()
+
+def _field_text(vuln, field: str) -> str:
+    value = vuln.get(field)
+    if not value:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(item) for item in value)
+    return str(value)
+
+def canonical_identifiers(vuln) -> List[str]:
+    """
+    Tool-independent identifiers for what a finding is about, most specific
+    kind only: CVE ids, else CWE at a location, else header, else port
+    """
+    cves = sorted({
+        cve.upper() for field in CVE_FIELDS
+        for cve in CVE_PATTERN.findall(_field_text(vuln, field))
+    })
+    if cves:
+        return cves
+        
+    location = vuln.get('parameter') or vuln.get('path')
+    if location:
+        cwes = sorted({f"CWE-{cwe}" for cwe in CWE_PATTERN.findall(_field_text(vuln, 'cwe'))})
+        if cwes:
+            return [f"{cwe}@{location}" for cwe in cwes]
+            
+    header = vuln.get('header')
+    if header:
+        return [f"header:{str(header).strip().lower()}"]
+        
+    port = vuln.get('port')
+    if port:
+        port = str(port)
+        return [f"port:{port if '/' in port else port + '/tcp'}"]
+    return []
+
+def host_key(host) -> str:
+    """Host name of a target URL, host:port or address, for correlation"""
+    host = str(host or '')
+    try:
+        parsed = urlparse(host if '://' in host else f"//{host}")
+        return (parsed.hostname or host).lower()
+    except ValueError:
+        return host.lower()
+
+_SCRIPT_DIGEST = None
+
+def script_digest() -> str:
+    """Hash of this script, used to version the in-process checks"""
+    global _SCRIPT_DIGEST
+    if _SCRIPT_DIGEST is None:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            _SCRIPT_DIGEST = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _SCRIPT_DIGEST
+
+def load_targets(filename: str) -> List[str]:
+    """Read targets from a file, one per line, ignoring blanks and # comments"""
+    targets = []
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                targets.append(line)
+    return targets
+
+class CommandRunner:
+    """
+    Drives external tool processes from a single asyncio event loop.
+    Output is streamed line by line to handlers and log files instead of
+    being buffered, so only a bounded tail of each stream is kept in memory.
+    """
+    
+    # Stream buffer limit; longer lines (e.g. nuclei JSON with an embedded
+    # response) are read in chunks of this size and joined
+    LINE_LIMIT = 1024 * 1024
+    
+    def __init__(self, tail_lines: int = 50):
+        self.tail_lines = tail_lines
+        self.loop = asyncio.new_event_loop()
+        self._processes = set()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name='command-runner', daemon=True
+        )
+        self._thread.start()
+        
+    def run(self, command: List[str], timeout: int = 300,
+            on_stdout: Optional[Callable[[str], None]] = None,
+            on_stderr: Optional[Callable[[str], None]] = None,
+            stdout_path: Optional[str] = None,
+            stderr_path: Optional[str] = None,
+            on_bytes: Optional[Callable[[int], None]] = None) -> Tuple[int, str, str]:
+        """Run a command on the event loop and block the caller until it exits"""
+        future = asyncio.run_coroutine_threadsafe(
+            self.run_async(command, timeout, on_stdout, on_stderr, stdout_path, stderr_path,
+                           on_bytes),
+            self.loop
+        )
+        return future.result()
+        
+    async def run_async(self, command: List[str], timeout: int = 300,
+                        on_stdout: Optional[Callable[[str], None]] = None,
+                        on_stderr: Optional[Callable[[str], None]] = None,
+                        stdout_path: Optional[str] = None,
+                        stderr_path: Optional[str] = None,
+                        on_bytes: Optional[Callable[[int], None]] = None) -> Tuple[int, str, str]:
+        """Run a command, streaming its output; returns (returncode, stdout tail, stderr tail)"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=self.LINE_LIMIT,
+                start_new_session=True
+            )
+        except Exception as e:
+            return -1, "", str(e)
+            
+        stdout_tail = deque(maxlen=self.tail_lines)
+        stderr_tail = deque(maxlen=self.tail_lines)
+        self._processes.add(process)
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._pump(process.stdout, on_stdout, stdout_path, stdout_tail, on_bytes),
+                    self._pump(process.stderr, on_stderr, stderr_path, stderr_tail, on_bytes),
+                    process.wait()
+                ),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            return -1, ''.join(stdout_tail), "Command timed out"
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+        except Exception as e:
+            await self._kill(process)
+            return -1, ''.join(stdout_tail), str(e)
+        finally:
+            self._processes.discard(process)
+            
+        return process.returncode, ''.join(stdout_tail), ''.join(stderr_tail)
+        
+    async def _pump(self, stream: asyncio.StreamReader,
+                    handler: Optional[Callable[[str], None]],
+                    path: Optional[str], tail: deque,
+                    on_bytes: Optional[Callable[[int], None]] = None):
+        """Forward each line of a stream to its handler, log file and tail buffer"""
+        log = open(path, 'w') if path else None
+        try:
+            while True:
+                raw = await self._read_line(stream)
+                if not raw:
+                    break
+                if on_bytes:
+                    on_bytes(len(raw))
+                line = raw.decode('utf-8', errors='replace')
+                tail.append(line)
+                if log:
+                    log.write(line)
+                if handler:
+                    try:
+                        handler(line)
+                    except Exception as e:
+                        print(f"[!] Output handler error: {e}")
+        finally:
+            if log:
+                log.close()
+                
+    @staticmethod
+    async def _read_line(stream: asyncio.StreamReader) -> bytes:
+        """readline() that does not fail on lines longer than the stream limit"""
+        chunks = []
+        while True:
+            try:
+                chunks.append(await stream.readuntil(b'\n'))
+                break
+            except asyncio.IncompleteReadError as e:
+                # Last line without a newline at EOF
+                chunks.append(e.partial)
+                break
+            except asyncio.LimitOverrunError as e:
+                chunks.append(await stream.read(max(e.consumed, 1)))
+        return b''.join(chunks)
+        
+    async def _kill(self, process):
+        """Kill a process and its children (wrapper scripts) and reap it"""
+        if process.returncode is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+            await process.wait()
+            
+    def cancel_all(self):
+        """Kill every running tool process, e.g. on Ctrl-C or fail-fast"""
+        async def _cancel():
+            for process in list(self._processes):
+                await self._kill(process)
+        future = asyncio.run_coroutine_threadsafe(_cancel(), self.loop)
+        # Output handlers run on the loop thread and must not wait on it
+        if threading.current_thread() is not self._thread:
+            future.result(timeout=10)
+        
+    def close(self):
+        """Stop the event loop thread"""
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+class HTTPClient:
+    """
+    Pooled keep-alive HTTP client shared by all in-process checks, with
+    retry and exponential backoff on connection errors and 429/502/503/504
+    responses. Retries happen here rather than in urllib3 so every attempt
+    draws from the host's rate budget. 500 is not retried: probes that
+    trigger a server error would otherwise be sent several times.
+    """
+    
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    RETRY_METHODS = frozenset({'GET', 'HEAD'})
+    
+    def __init__(self, pool_size: int = 10, retries: int = 2, backoff: float = 0.5,
+                 timeout: int = 10, verify: bool = False, budgets: Optional['RateBudgets'] = None):
+        self.timeout = timeout
+        self.verify = verify
+        self.budgets = budgets
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Automated Vulnerability Scanner/1.0'
+        
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the shared connection pool"""
+        return self.request('GET', url, **kwargs)
+        
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the shared connection pool, retrying idempotent ones"""
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('verify', self.verify)
+        limiter = self.budgets.limiter(url) if self.budgets else None
+        attempts = self.retries + 1 if method.upper() in self.RETRY_METHODS else 1
+        
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            if limiter:
+                limiter.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                if limiter:
+                    limiter.record(None, time.monotonic() - started)
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                if not retryable or attempt + 1 == attempts:
+                    raise
+                continue
+            if limiter:
+                limiter.record(response.status_code, time.monotonic() - started,
+                               response.headers.get('Retry-After'))
+            if response.status_code not in self.RETRY_STATUSES or attempt + 1 == attempts:
+                return response
+            response.close()
+            
+    def close(self):
+        self.session.close()
+
+class RateLimiter:
+    """Thread-safe token bucket limiting requests per second"""
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class InjectionPointParser(HTMLParser):
+    """Collects form fields and query-string links from a page as injection points"""
+    
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+        self.host = urlparse(base_url).netloc
+        self.points = []
+        self._form = None
+        
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self._form = {
+                'url': urljoin(self.base_url, attrs.get('action') or ''),
+                'method': (attrs.get('method') or 'get').upper(),
+                'fields': {}
+            }
+        elif tag in ('input', 'textarea', 'select') and self._form is not None:
+            name = attrs.get('name')
+            if name and (attrs.get('type') or '').lower() not in ('submit', 'button', 'image', 'file'):
+                self._form['fields'][name] = attrs.get('value') or '1'
+        elif tag == 'a' and attrs.get('href'):
+            url = urljoin(self.base_url, attrs['href'])
+            parsed = urlparse(url)
+            if parsed.netloc == self.host and parsed.query:
+                fields = dict(parse_qsl(parsed.query, keep_blank_values=True))
+                self._add(urlunparse(parsed._replace(query='', fragment='')), 'GET', fields)
+                
+    def handle_endtag(self, tag: str):
+        if tag == 'form' and self._form is not None:
+            self._add(self._form['url'], self._form['method'], self._form['fields'])
+            self._form = None
+            
+    def _add(self, url: str, method: str, fields: Dict[str, str]):
+        if fields and urlparse(url).netloc == self.host:
+            self.points.append({'url': url, 'method': method, 'fields': fields})
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Token bucket whose rate backs off multiplicatively when the server
+    returns 429/503 and recovers additively while responses are healthy.
+    """
+    
+    def __init__(self, rate: float, min_rate: float = 1.0, recover_after: int = 20):
+        super().__init__(rate)
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.recover_after = recover_after
+        self._healthy = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        
+    def acquire(self):
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        super().acquire()
+        
+    async def acquire_async(self):
+        """Async variant of acquire for use on an event loop"""
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            if self.rate <= 0:
+                return
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+            
+    def throttled(self, retry_after: Optional[float] = None):
+        """Server pushed back: halve the rate (once per second) and honour Retry-After"""
+        with self._lock:
+            self._healthy = 0
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self._last_decrease = now
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.capacity = max(1, int(self.rate))
+                self.tokens = min(self.tokens, 0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + min(retry_after, 60))
+                
+    def succeeded(self):
+        """Healthy response: creep back toward the configured rate"""
+        with self._lock:
+            self._healthy += 1
+            if self._healthy >= self.recover_after and self.rate < self.max_rate:
+                self._healthy = 0
+                self.rate = min(self.max_rate, self.rate + max(1.0, self.max_rate / 10))
+                self.capacity = max(1, int(self.rate))
+
+class HostRateLimiter(AdaptiveRateLimiter):
+    """
+    Request budget for one target host, shared by every in-process check.
+    Besides 429s it backs off on gateway errors and when response latency
+    climbs well above the best latency seen, which is usually the first
+    sign of an overloaded target or a WAF starting to tarpit.
+    """
+    
+    # Statuses that mean the server or a proxy in front of it is overloaded;
+    # plain 500s are what injection probes provoke and are not counted
+    OVERLOAD_STATUSES = {429, 502, 503, 504}
+    LATENCY_FACTOR = 3.0
+    LATENCY_SLACK = 0.2
+    WARMUP = 10
+    
+    def __init__(self, rate: float, min_rate: float = 1.0, recover_after: int = 20):
+        super().__init__(rate, min_rate=min_rate, recover_after=recover_after)
+        self.latency = None
+        self.best_latency = None
+        self.samples = 0
+        
+    def record(self, status: Optional[int], latency: float, retry_after: Optional[str] = None):
+        """Feed back one response (status None for a connection error or timeout)"""
+        if status is None or status in self.OVERLOAD_STATUSES:
+            self.throttled(float(retry_after) if retry_after and retry_after.isdigit() else None)
+            return
+            
+        with self._lock:
+            self.samples += 1
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if self.best_latency is None or self.latency < self.best_latency:
+                self.best_latency = self.latency
+            else:
+                # Let the reference drift up slowly if the target is just slower now
+                self.best_latency += (self.latency - self.best_latency) * 0.01
+            slow = (
+                self.samples > self.WARMUP
+                and self.latency > self.best_latency * self.LATENCY_FACTOR
+                and self.latency > self.best_latency + self.LATENCY_SLACK
+            )
+        if slow:
+            self.throttled()
+        else:
+            self.succeeded()
+
+class RateBudgets:
+    """
+    Per-host request budgets for a scan. Every in-process request to a
+    host draws from that host's HostRateLimiter, and external tools are
+    given rate flags derived from its current (adapted) rate.
+    """
+    
+    def __init__(self, rate: float = 0.0, hosts: Optional[Dict[str, float]] = None,
+                 min_rate: float = 1.0):
+        self.rate = rate
+        # Host glob pattern -> requests per second, checked in order
+        self.hosts = hosts or {}
+        self.min_rate = min_rate
+        self._limiters: Dict[str, Optional[HostRateLimiter]] = {}
+        self._lock = threading.Lock()
+        
+    @classmethod
+    def from_file(cls, filename: Optional[str], environment: Optional[str],
+                  rate: float = 0.0) -> 'RateBudgets':
+        """
+        Budgets for one environment from a JSON file of the form
+        {"staging": {"rate": 10, "min_rate": 1, "hosts": {"*.staging.example.com": 5}}}
+        """
+        if not filename:
+            return cls(rate)
+        with open(filename, 'r') as f:
+            environments = json.load(f)
+        if environment not in environments:
+            raise KeyError(f"no budget for environment '{environment}' in {filename}")
+        budget = environments[environment]
+        return cls(
+            rate=float(budget.get('rate', rate)),
+            hosts={pattern: float(value) for pattern, value in budget.get('hosts', {}).items()},
+            min_rate=float(budget.get('min_rate', 1.0))
+        )
+        
+    def rate_for(self, host: str) -> float:
+        for pattern, rate in self.hosts.items():
+            if fnmatch.fnmatch(host, pattern.lower()):
+                return rate
+        return self.rate
+        
+    def limiter(self, url: str) -> Optional[HostRateLimiter]:
+        """Shared limiter for a URL's host, or None if the host has no budget"""
+        host = host_key(url)
+        with self._lock:
+            if host not in self._limiters:
+                rate = self.rate_for(host)
+                self._limiters[host] = HostRateLimiter(rate, min_rate=self.min_rate) if rate > 0 else None
+            return self._limiters[host]
+            
+    def tool_rate(self, url: str, share: int) -> Optional[float]:
+        """Requests per second one of `share` concurrent tools may send, or None if unlimited"""
+        limiter = self.limiter(url)
+        if limiter is None:
+            return None
+        return max(self.min_rate, limiter.rate / max(1, share))
+
+class AsyncHTTPConnection:
+    """Minimal persistent HTTP/1.1 connection on asyncio streams"""
+    
+    # Response body bytes kept for soft-404 comparison; the rest is discarded
+    MAX_BODY = 64 * 1024
+    
+    def __init__(self, host: str, port: int, use_ssl: bool, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.host_header = host if port in (80, 443) else f"{host}:{port}"
+        self.reader = None
+        self.writer = None
+        
+    async def _connect(self):
+        context = None
+        if self.use_ssl:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=context, server_hostname=self.host if context else None
+        )
+        
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+        
+    async def request(self, method: str, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request, reconnecting once if the kept-alive connection was dropped"""
+        for attempt in range(2):
+            if self.writer is None:
+                await asyncio.wait_for(self._connect(), self.timeout)
+            try:
+                return await asyncio.wait_for(self._exchange(method, path), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, ssl.SSLError):
+                await self.close()
+                if attempt:
+                    raise
+            except (asyncio.TimeoutError, ValueError, IndexError):
+                # A timed-out or unparseable response leaves the stream mid-message
+                await self.close()
+                raise
+                
+    async def _exchange(self, method: str, path: str) -> Tuple[int, Dict[str, str], bytes]:
+        self.writer.write((
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host_header}\r\n"
+            f"User-Agent: Automated Vulnerability Scanner/1.0\r\n"
+            f"Accept: */*\r\n"
+            f"Connection: keep-alive\r\n\r\n"
+        ).encode('latin-1'))
+        await self.writer.drain()
+        
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+            
+        body = await self._read_body(method, status, headers)
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, headers, body
+        
+    async def _read_body(self, method: str, status: int, headers: Dict[str, str]) -> bytes:
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            return b''
+        kept = bytearray()
+        
+        def keep(data: bytes):
+            if len(kept) < self.MAX_BODY:
+                kept.extend(data[:self.MAX_BODY - len(kept)])
+                
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                remaining = size
+                while remaining:
+                    data = await self.reader.readexactly(min(remaining, 65536))
+                    keep(data)
+                    remaining -= len(data)
+                await self.reader.readexactly(2)
+        elif 'content-length' in headers:
+            remaining = int(headers['content-length'])
+            while remaining:
+                data = await self.reader.readexactly(min(remaining, 65536))
+                keep(data)
+                remaining -= len(data)
+        else:
+            # No framing: body runs to EOF and the connection cannot be reused
+            while True:
+                data = await self.reader.read(65536)
+                if not data:
+                    break
+                keep(data)
+            await self.close()
+        return bytes(kept)
+
+class DirectoryFuzzer:
+    """
+    Built-in asyncio directory fuzzer: a fixed window of keep-alive
+    connections, adaptive rate limiting on 429/503, wildcard/soft-404
+    filtering and memory-mapped wordlists.
+    """
+    
+    HIT_STATUSES = {200, 204, 301, 302, 307, 308, 401, 403}
+    
+    def __init__(self, base_url: str, wordlist: Optional[str] = None,
+                 extensions: Optional[List[str]] = None, concurrency: int = 10,
+                 rate: float = 50.0, timeout: float = 10,
+                 host_limiter: Optional[HostRateLimiter] = None):
+        parsed = urlparse(base_url)
+        self.use_ssl = parsed.scheme == 'https'
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if self.use_ssl else 80)
+        self.base_path = parsed.path.rstrip('/') + '/'
+        self.wordlist = wordlist
+        self.extensions = extensions or []
+        self.concurrency = concurrency
+        self.limiter = AdaptiveRateLimiter(rate)
+        # Shared budget for the host, on top of the fuzzer's own rate
+        self.host_limiter = host_limiter
+        self.timeout = timeout
+        self.soft_404 = []
+        self.requests_sent = 0
+        self.errors = 0
+        
+    def iter_words(self):
+        """Yield candidate paths; wordlists are memory-mapped rather than loaded"""
+        def expand(word: str):
+            yield word
+            for extension in self.extensions:
+                yield f"{word}.{extension}"
+                
+        if not self.wordlist or not os.path.exists(self.wordlist) or os.path.getsize(self.wordlist) == 0:
+            for word in FALLBACK_WORDS:
+                yield from expand(word)
+            return
+            
+        with open(self.wordlist, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for raw in iter(mm.readline, b''):
+                    word = raw.strip().decode('utf-8', errors='ignore')
+                    if word and not word.startswith('#'):
+                        yield from expand(word.lstrip('/'))
+                        
+    def path_for(self, word: str) -> str:
+        """Request path for a wordlist entry, percent-encoded like gobuster does"""
+        return self.base_path + quote(word, safe='/')
+        
+    @staticmethod
+    def _signature(status: int, body: bytes, word: str) -> Tuple[int, str]:
+        """Response signature with the requested word removed, for soft-404 matching"""
+        normalized = body.replace(word.encode('utf-8', errors='ignore'), b'')
+        return status, hashlib.sha1(normalized).hexdigest()
+        
+    def _is_soft_404(self, status: int, body: bytes, word: str) -> bool:
+        if not self.soft_404:
+            return False
+        signature = self._signature(status, body, word)
+        for probe_status, probe_hash, probe_length in self.soft_404:
+            if signature == (probe_status, probe_hash):
+                return True
+            # Pages that echo the path vary slightly in length
+            if status == probe_status and abs(len(body) - probe_length) <= 2 * len(word) + 16:
+                return True
+        return False
+        
+    async def _fetch(self, connection: AsyncHTTPConnection, word: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """Request one path under the rate limit, backing off on 429/503"""
+        for attempt in range(3):
+            await self.limiter.acquire_async()
+            if self.host_limiter:
+                await self.host_limiter.acquire_async()
+            self.requests_sent += 1
+            started = time.monotonic()
+            try:
+                status, headers, body = await connection.request('GET', self.path_for(word))
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                self.errors += 1
+                if self.host_limiter:
+                    self.host_limiter.record(None, time.monotonic() - started)
+                return None
+            if self.host_limiter:
+                self.host_limiter.record(status, time.monotonic() - started, headers.get('retry-after'))
+            if status in (429, 503):
+                retry_after = headers.get('retry-after', '')
+                self.limiter.throttled(float(retry_after) if retry_after.isdigit() else None)
+                continue
+            self.limiter.succeeded()
+            return status, headers, body
+        return None
+        
+    async def _calibrate(self, connection: AsyncHTTPConnection):
+        """Request random paths to learn what the server returns for missing content"""
+        for suffix in ('', '.php', '/'):
+            word = ''.join(random.choices(string.ascii_lowercase + string.digits, k=24)) + suffix
+            result = await self._fetch(connection, word)
+            if result and result[0] != 404:
+                status, headers, body = result
+                self.soft_404.append(self._signature(status, body, word) + (len(body),))
+                
+    async def run_async(self, on_hit: Callable[[str, int, int], None]):
+        """Fuzz every candidate path; on_hit(path, status, size) is called per discovery"""
+        words = asyncio.Queue(maxsize=self.concurrency * 4)
+        connections = [
+            AsyncHTTPConnection(self.host, self.port, self.use_ssl, self.timeout)
+            for _ in range(self.concurrency)
+        ]
+        
+        await self._calibrate(connections[0])
+        if self.soft_404:
+            print(f"[*] Directory fuzzing: wildcard responses detected, filtering {len(self.soft_404)} signatures")
+            
+        async def worker(connection: AsyncHTTPConnection):
+            while True:
+                word = await words.get()
+                if word is None:
+                    return
+                result = await self._fetch(connection, word)
+                if result is None:
+                    continue
+                status, headers, body = result
+                if status in self.HIT_STATUSES and not self._is_soft_404(status, body, word):
+                    size = int(headers.get('content-length', len(body)) or 0)
+                    on_hit(self.path_for(word), status, size)
+                    
+        workers = [asyncio.ensure_future(worker(connection)) for connection in connections]
+        try:
+            for word in self.iter_words():
+                await words.put(word)
+            for _ in workers:
+                await words.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            for connection in connections:
+                await connection.close()
+                
+    def run(self, on_hit: Callable[[str, int, int], None], timeout: Optional[float] = None):
+        """Run the fuzzer on a private event loop in the calling thread"""
+        async def bounded():
+            await asyncio.wait_for(self.run_async(on_hit), timeout)
+        try:
+            asyncio.run(bounded())
+        except asyncio.TimeoutError:
+            print("[!] Directory fuzzing timed out; keeping results so far")
+            return False
+        return True
+
+class PathClassifier:
+    """
+    Classifies discovered paths against sensitive-path rules in a single
+    pass using an Aho-Corasick automaton. When several rules match, the
+    earliest rule wins, as with the original ordered pattern list.
+    """
+    
+    def __init__(self, rules: Optional[List[Dict]] = None):
+        if rules is None:
+            rules = [
+                {'pattern': pattern, 'description': desc, 'severity': severity}
+                for pattern, desc, severity in SENSITIVE_PATH_PATTERNS
+            ]
+        self.rules = [dict(rule, pattern=rule['pattern'].lower()) for rule in rules]
+        self._build()
+        
+    @classmethod
+    def from_file(cls, filename: str, overrides: Optional[Dict[str, str]] = None) -> 'PathClassifier':
+        """
+        Load rules from a JSON file:
+          {"rules": [{"pattern": ..., "description": ..., "severity": ...}],
+           "severity_overrides": {"test": "INFO"},
+           "replace_defaults": false}
+        New file rules take precedence over the defaults; a rule with the
+        same pattern as a default replaces it in the default's position.
+        """
+        rules = []
+        file_overrides = {}
+        replace_defaults = False
+        if filename:
+            with open(filename, 'r') as f:
+                config = json.load(f)
+            rules = config.get('rules', [])
+            file_overrides = config.get('severity_overrides', {})
+            replace_defaults = config.get('replace_defaults', False)
+            
+        if not replace_defaults:
+            custom = {rule['pattern'].lower(): rule for rule in rules}
+            defaults = [
+                custom.pop(pattern, {'pattern': pattern, 'description': desc, 'severity': severity})
+                for pattern, desc, severity in SENSITIVE_PATH_PATTERNS
+            ]
+            rules = list(custom.values()) + defaults
+            
+        file_overrides.update(overrides or {})
+        file_overrides = {pattern.lower(): severity.upper() for pattern, severity in file_overrides.items()}
+        for rule in rules:
+            if rule['pattern'].lower() in file_overrides:
+                rule['severity'] = file_overrides[rule['pattern'].lower()]
+        return cls(rules)
+        
+    def _build(self):
+        """Build goto/fail tables; each node keeps the best (lowest) rule index it completes"""
+        self._goto = [{}]
+        self._best = [None]
+        for index, rule in enumerate(self.rules):
+            node = 0
+            for char in rule['pattern']:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._best.append(None)
+                node = next_node
+            if self._best[node] is None or index < self._best[node]:
+                self._best[node] = index
+                
+        self._fail = [0] * len(self._goto)
+        queue_ = deque(self._goto[0].values())
+        while queue_:
+            node = queue_.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+                queue_.append(child)
+                
+    def classify(self, path: str) -> Optional[Dict]:
+        """Highest-priority rule matching anywhere in the path, or None"""
+        goto, fail, best_at = self._goto, self._fail, self._best
+        best = None
+        node = 0
+        for char in path.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            found = best_at[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return self.rules[best] if best is not None else None
+
+class NmapXMLParser:
+    """
+    Incremental parser for nmap XML output. Each <host> is turned into
+    findings as soon as its closing tag arrives and is then discarded, so
+    memory stays flat regardless of how many hosts are scanned.
+    """
+    
+    # Services considered insecure when found open
+    VULN_SERVICES = {'telnet', 'ftp', 'vnc', 'rdp', 'smb'}
+    
+    def __init__(self, on_host: Optional[Callable[[str, List[Dict]], None]] = None):
+        self.on_host = on_host
+        self.vulnerabilities = []
+        self.hosts_parsed = 0
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._root = None
+        self._failed = False
+        
+    def feed(self, data: str):
+        """Feed a chunk of XML (e.g. one line of nmap stdout)"""
+        if self._failed:
+            return
+        try:
+            self._parser.feed(data)
+            self._drain(self._parser.read_events())
+        except ET.ParseError as e:
+            self._failed = True
+            print(f"[!] Error parsing Nmap results: {e}")
+            
+    def close(self):
+        """Flush the parser once the stream has ended"""
+        if self._failed:
+            return
+        try:
+            self._parser.close()
+            self._drain(self._parser.read_events())
+        except ET.ParseError as e:
+            # Truncated output (e.g. nmap timed out); completed hosts are kept
+            print(f"[!] Nmap XML ended early: {e}")
+            
+    def parse_file(self, filename: str) -> List[Dict]:
+        """Parse a saved nmap XML file with iterparse"""
+        try:
+            self._drain(ET.iterparse(filename, events=('start', 'end')))
+        except ET.ParseError as e:
+            print(f"[!] Error parsing Nmap results: {e}")
+        return self.vulnerabilities
+        
+    def _drain(self, events):
+        """Process completed <host> elements and free them"""
+        for event, elem in events:
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                continue
+            if elem.tag == 'host':
+                findings = self._host_findings(elem)
+                self.vulnerabilities.extend(findings)
+                self.hosts_parsed += 1
+                if self.on_host:
+                    self.on_host(findings[0]['host'] if findings else self._host_address(elem), findings)
+                elem.clear()
+                if self._root is not None and self._root is not elem:
+                    self._root.clear()
+                    
+    @staticmethod
+    def _host_address(host: ET.Element) -> str:
+        """Prefer the IPv4 address, falling back to any address"""
+        address = host.find('address[@addrtype="ipv4"]')
+        if address is None:
+            address = host.find('address')
+        return address.get('addr', 'unknown') if address is not None else 'unknown'
+        
+    @staticmethod
+    def _host_name(host: ET.Element) -> Optional[str]:
+        """Name the host was scanned as, else its first reverse DNS name"""
+        names = host.findall('hostnames/hostname')
+        for name in names:
+            if name.get('type') == 'user' and name.get('name'):
+                return name.get('name')
+        return names[0].get('name') if names else None
+        
+    def _host_findings(self, host: ET.Element) -> List[Dict]:
+        """Extract findings from a single <host> element"""
+        vulnerabilities = []
+        ip = self._host_address(host)
+        hostname = self._host_name(host)
+        
+        # Check for open ports
+        for port in host.iter('port'):
+            state = port.find('state')
+            if state is not None and state.get('state') == 'open':
+                port_id = port.get('portid')
+                protocol = port.get('protocol')
+                service = port.find('service')
+                service_name = service.get('name', 'unknown') if service is not None else 'unknown'
+                
+                # Check for vulnerable services
+                if service_name.lower() in self.VULN_SERVICES:
+                    vulnerabilities.append({
+                        'tool': 'nmap',
+                        'type': 'Insecure Service',
+                        'severity': 'HIGH',
+                        'host': ip,
+                        'port': f"{port_id}/{protocol}",
+                        'service': service_name,
+                        'description': f"Potentially insecure service {service_name} detected",
+                        'recommendation': f"Disable {service_name} or use secure alternative"
+                    })
+                    
+        # Parse script results
+        for script in host.iter('script'):
+            script_id = script.get('id')
+            output = script.get('output', '')
+            
+            # Check for specific vulnerabilities
+            if 'VULNERABLE' in output or 'vulnerable' in output:
+                vulnerabilities.append({
+                    'tool': 'nmap',
+                    'type': 'Script Detection',
+                    'severity': 'HIGH',
+                    'host': ip,
+                    'script': script_id,
+                    'description': output.strip(),
+                    'recommendation': 'Review and patch identified vulnerability'
+                })
+                
+        # Other tools report the URL host; the name lets findings correlate
+        if hostname:
+            for vuln in vulnerabilities:
+                vuln['hostname'] = hostname
+        return vulnerabilities
+
+def iter_json_array(f, key: str, chunk_size: int = 65536):
+    """
+    Yield the objects of every "key": [...] array in a JSON stream one at a
+    time, reading the file in chunks so memory is bounded by the largest
+    single object rather than the whole document.
+    """
+    decoder = json.JSONDecoder()
+    marker = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    buffer = ''
+    in_array = False
+    eof = False
+    
+    while True:
+        if not in_array:
+            match = marker.search(buffer)
+            if match:
+                yield ('prefix', buffer[:match.start()])
+                buffer = buffer[match.end():]
+                in_array = True
+                continue
+            if eof:
+                return
+            # Keep the text since the last closed object: it may hold the
+            # start of the key, and the enclosing object's leading fields
+            # (e.g. nikto's "ip") that callers read from the prefix
+            cut = buffer.rfind('}')
+            if cut >= 0:
+                buffer = buffer[cut + 1:]
+        else:
+            stripped = buffer.lstrip(' \t\r\n,')
+            if stripped.startswith(']'):
+                buffer = stripped[1:]
+                in_array = False
+                continue
+            if stripped:
+                try:
+                    item, end = decoder.raw_decode(stripped)
+                except ValueError:
+                    if eof:
+                        # Truncated document (e.g. tool timed out)
+                        return
+                else:
+                    buffer = stripped[end:]
+                    yield ('item', item)
+                    continue
+            elif eof:
+                return
+            buffer = stripped
+            
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+class NiktoParser:
+    """
+    Parses nikto results into findings with severities derived from the
+    message, deduplicated by CVE/OSVDB id (or nikto id and URL).
+    """
+    
+    # First matching rule wins
+    SEVERITY_RULES = [
+        (re.compile(r'remote code|command execution|code execution|shell upload|backdoor', re.I), 'CRITICAL'),
+        (re.compile(r'sql injection|directory traversal|file inclusion|arbitrary file|'
+                    r'default (password|credential|account)|authentication bypass|\.git/|\.env\b', re.I), 'HIGH'),
+        (re.compile(r'cross[- ]site|xss|phpinfo|admin|backup|password|directory indexing|'
+                    r'config|database|\.bak\b|\.sql\b', re.I), 'MEDIUM'),
+        (re.compile(r'header|cookie|banner|allowed http methods|outdated|version|'
+                    r'uncommon|etag|inode', re.I), 'LOW')
+    ]
+    
+    REFERENCE_PATTERN = re.compile(r'\b(CVE-\d{4}-\d{4,7}|OSVDB-\d+)\b', re.I)
+    
+    # URLs kept per deduplicated finding
+    MAX_URLS = 20
+    
+    def __init__(self, target: str):
+        self.target = target
+        self.findings = {}
+        
+    @property
+    def vulnerabilities(self) -> List[Dict]:
+        return list(self.findings.values())
+        
+    def severity(self, message: str, references: List[str]) -> str:
+        """Map a nikto message to a severity"""
+        for pattern, severity in self.SEVERITY_RULES:
+            if pattern.search(message):
+                # A known CVE is at least MEDIUM
+                if severity in ('LOW', 'INFO') and any(r.startswith('CVE-') for r in references):
+                    return 'MEDIUM'
+                return severity
+        return 'MEDIUM' if references else 'INFO'
+        
+    def add(self, message: str, url: str = '', nikto_id: str = '', method: str = '',
+            references_text: str = '', ip: Optional[str] = None):
+        """Record one nikto item, merging it into an existing finding with the same id"""
+        references = sorted({
+            ref.upper() for ref in self.REFERENCE_PATTERN.findall(f"{message} {references_text}")
+        })
+        cves = [ref for ref in references if ref.startswith('CVE-')]
+        key = cves[0] if cves else (references[0] if references else f"nikto-{nikto_id}:{url}")
+        
+        existing = self.findings.get(key)
+        if existing:
+            if url and url not in existing['urls'] and len(existing['urls']) < self.MAX_URLS:
+                existing['urls'].append(url)
+            return
+            
+        self.findings[key] = {
+            'tool': 'nikto',
+            'type': 'Web Vulnerability',
+            'severity': self.severity(message, references),
+            'host': self.target,
+            'ip': ip or '',
+            'path': url,
+            'urls': [url] if url else [],
+            'reference': key if references else '',
+            'references': references,
+            'nikto_id': nikto_id,
+            'method': method,
+            'description': message.strip(),
+            'recommendation': 'Review and address identified issue'
+        }
+        
+    def add_item(self, item: Dict, ip: Optional[str] = None):
+        """Record one entry of nikto's JSON "vulnerabilities" array"""
+        osvdb = str(item.get('OSVDB') or '')
+        references_text = str(item.get('references') or '')
+        if osvdb and osvdb != '0':
+            references_text += f" OSVDB-{osvdb}"
+        self.add(
+            str(item.get('msg', '')),
+            url=str(item.get('url', '')),
+            nikto_id=str(item.get('id', '')),
+            method=str(item.get('method', '')),
+            references_text=references_text,
+            ip=ip
+        )
+        
+    def add_text_line(self, line: str):
+        """Record a finding from a nikto stdout line (fallback when no JSON is written)"""
+        if not line.startswith('+ '):
+            return
+        text = line[2:].strip()
+        if not self.REFERENCE_PATTERN.search(text):
+            return
+        url, sep, message = text.partition(': ')
+        if sep and url.startswith('/'):
+            self.add(message, url=url)
+        else:
+            self.add(text)
+            
+    def parse_file(self, filename: str) -> int:
+        """Stream nikto's JSON report; returns the number of items read"""
+        count = 0
+        ip = None
+        ip_pattern = re.compile(r'"ip"\s*:\s*"([^"]*)"')
+        try:
+            with open(filename, 'r', errors='replace') as f:
+                for kind, value in iter_json_array(f, 'vulnerabilities'):
+                    if kind == 'prefix':
+                        # Each array belongs to a new host object; only its
+                        # own fields (after the previous object closed) count
+                        match = ip_pattern.search(value[value.rfind('}') + 1:])
+                        ip = match.group(1) if match else None
+                    elif isinstance(value, dict):
+                        self.add_item(value, ip=ip)
+                        count += 1
+        except OSError as e:
+            print(f"[!] Error reading Nikto results: {e}")
+        return count
+
+class ToolProbeCache:
+    """
+    Caches tool availability probes on disk. Entries are keyed by the
+    binary's resolved path and mtime, so upgrading a tool invalidates them.
+    """
+    
+    PROBE_TIMEOUT = 5
+    
+    def __init__(self, path: Optional[str] = None, command_runner: Optional[CommandRunner] = None,
+                 refresh: bool = False):
+        self.path = path or os.path.join(CACHE_DIR, 'tool_probes.json')
+        self.command_runner = command_runner or CommandRunner()
+        self.refresh = refresh
+        self._resolved = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        
+    def _load(self) -> Dict[str, Dict]:
+        """Load cached probe entries"""
+        if self.refresh:
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+            
+    def _save(self, entries: Dict[str, Dict]):
+        """Write probe entries atomically"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[!] Could not write tool cache: {e}")
+            
+    @staticmethod
+    def _fingerprint(tool: str) -> Optional[Dict]:
+        """Resolved path and mtime of a tool's binary, or None if not on PATH"""
+        binary = shutil.which(TOOL_PROBES[tool][0])
+        if not binary:
+            return None
+        resolved = os.path.realpath(binary)
+        try:
+            mtime = os.stat(resolved).st_mtime
+        except OSError:
+            return None
+        return {'path': resolved, 'mtime': mtime}
+        
+    def resolve(self, tools: List[str]) -> Dict[str, bool]:
+        """Return availability for the given tools, probing cache misses in parallel"""
+        with self._lock:
+            pending = [t for t in tools if t in TOOL_PROBES and t not in self._resolved]
+            if pending:
+                self._resolve_pending(pending)
+            return {t: self._resolved.get(t, False) for t in tools}
+            
+    def version(self, tool: str) -> str:
+        """First line of a tool's version probe output (empty if unknown)"""
+        self.resolve([tool])
+        return self._versions.get(tool, '')
+        
+    def _resolve_pending(self, tools: List[str]):
+        """Fill in availability for tools not yet resolved in this process"""
+        entries = self._load()
+        misses = {}
+        for tool in tools:
+            fingerprint = self._fingerprint(tool)
+            if fingerprint is None:
+                self._resolved[tool] = False
+                continue
+            cached = entries.get(tool)
+            if cached and cached.get('path') == fingerprint['path'] and cached.get('mtime') == fingerprint['mtime']:
+                self._resolved[tool] = cached.get('available', False)
+                self._versions[tool] = cached.get('version', '')
+            else:
+                misses[tool] = fingerprint
+                
+        if not misses:
+            return
+            
+        async def probe_all():
+            return await asyncio.gather(*[
+                self.command_runner.run_async(TOOL_PROBES[tool], timeout=self.PROBE_TIMEOUT)
+                for tool in misses
+            ])
+            
+        results = asyncio.run_coroutine_threadsafe(probe_all(), self.command_runner.loop).result()
+        for (tool, fingerprint), (returncode, stdout, stderr) in zip(misses.items(), results):
+            available = returncode == 0
+            lines = [line.strip() for line in (stdout + stderr).splitlines() if line.strip()]
+            version = lines[0] if lines else ''
+            self._resolved[tool] = available
+            self._versions[tool] = version
+            entries[tool] = dict(
+                fingerprint, available=available, version=version,
+                checked=datetime.now().isoformat()
+            )
+            
+        self._save(entries)
+
+class ScanAborted(Exception):
+    """Raised when --fail-fast-on stops a scan early"""
+
+class ResultCache:
+    """
+    Content-addressed cache of parsed tool findings. Entries are keyed by
+    target, tool, tool version, scan type and a target fingerprint, and
+    expire after a TTL.
+    """
+    
+    def __init__(self, ttl: int, path: Optional[str] = None):
+        self.ttl = ttl
+        self.path = path or os.path.join(CACHE_DIR, 'results')
+        os.makedirs(self.path, exist_ok=True)
+        
+    @staticmethod
+    def key(**parts) -> str:
+        """Stable hash of the cache key components"""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+        
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+        
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """Cached findings for a key, or None on a miss or expired entry"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get('created', 0) > self.ttl:
+            self._remove(entry_path)
+            return None
+        return entry.get('findings', [])
+        
+    def put(self, key: str, findings: List[Dict], **metadata):
+        """Store findings for a key"""
+        entry = dict(metadata, created=time.time(), findings=findings)
+        entry_path = self._entry_path(key)
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            print(f"[!] Could not write result cache: {e}")
+            
+    def evict_expired(self) -> int:
+        """Delete expired entries; returns how many were removed"""
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.path):
+            if not name.endswith('.json'):
+                continue
+            entry_path = os.path.join(self.path, name)
+            try:
+                if os.path.getmtime(entry_path) < cutoff:
+                    self._remove(entry_path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+        
+    @staticmethod
+    def _remove(entry_path: str):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
+
+class RuntimeHistory:
+    """
+    Observed tool durations per target and scan type. Used to start the
+    longest-expected checks first and to size timeouts from a high
+    percentile of past runs instead of fixed values.
+    """
+    
+    MAX_SAMPLES = 20
+    MIN_SAMPLES = 3
+    TIMEOUT_PERCENTILE = 95
+    TIMEOUT_MARGIN = 1.5
+    MIN_TIMEOUT = 60
+    # Adaptive timeouts never exceed this multiple of the default
+    MAX_TIMEOUT_FACTOR = 4
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_DIR, 'runtimes.json')
+        self._lock = threading.Lock()
+        self._data = self._load()
+        
+    def _load(self) -> Dict[str, List[List]]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+            
+    @staticmethod
+    def _key(target: str, scan_type: str, tool: str) -> str:
+        return f"{target}|{scan_type}|{tool}"
+        
+    def record(self, target: str, scan_type: str, tool: str, seconds: float, completed: bool):
+        """Add one run's duration; runs that hit their timeout are flagged"""
+        with self._lock:
+            # Reread so runs recorded by other processes are kept
+            data = self._load()
+            samples = data.setdefault(self._key(target, scan_type, tool), [])
+            samples.append([round(seconds, 1), completed])
+            del samples[:-self.MAX_SAMPLES]
+            self._data = data
+            
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"[!] Could not write runtime history: {e}")
+                
+    def durations(self, target: str, scan_type: str, tool: str) -> List[float]:
+        """Past durations for this target, or for the tool on any target if too few"""
+        with self._lock:
+            samples = self._data.get(self._key(target, scan_type, tool), [])
+            if len(samples) < self.MIN_SAMPLES:
+                suffix = f"|{scan_type}|{tool}"
+                samples = [
+                    sample for key, entries in self._data.items() if key.endswith(suffix)
+                    for sample in entries
+                ]
+        return [seconds for seconds, completed in samples]
+        
+    @staticmethod
+    def percentile(values: List[float], percent: float) -> float:
+        """Nearest-rank percentile"""
+        ordered = sorted(values)
+        rank = max(0, min(len(ordered) - 1, int(len(ordered) * percent / 100 + 0.5) - 1))
+        return ordered[rank]
+        
+    def expected(self, target: str, scan_type: str, tool: str) -> float:
+        """Median past duration, or the default timeout as a rough proxy"""
+        durations = self.durations(target, scan_type, tool)
+        if not durations:
+            return DEFAULT_TOOL_TIMEOUTS.get(tool, 30)
+        return self.percentile(durations, 50)
+        
+    def timeout(self, target: str, scan_type: str, tool: str, default: int) -> int:
+        """
+        High percentile of past durations plus a margin, at least
+        MIN_TIMEOUT and at most MAX_TIMEOUT_FACTOR times the default.
+        Runs that timed out count at their timeout, so repeated timeouts
+        raise it up to that cap.
+        """
+        durations = self.durations(target, scan_type, tool)
+        if len(durations) < self.MIN_SAMPLES:
+            return default
+        timeout = self.percentile(durations, self.TIMEOUT_PERCENTILE) * self.TIMEOUT_MARGIN
+        return int(min(max(timeout, self.MIN_TIMEOUT), default * self.MAX_TIMEOUT_FACTOR))
+
+class ScanMetrics:
+    """
+    Live counters for a running scan: per-check state and timing, tool
+    output volume, findings per severity and queue depth. Thread-safe;
+    rendered as Prometheus text or a JSON snapshot by MetricsReporter.
+    """
+    
+    FINAL_STATES = ('completed', 'incomplete', 'cached', 'resumed', 'cancelled', 'failed')
+    STATES = ('queued', 'waiting', 'running') + FINAL_STATES
+    
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._checks: Dict[Tuple[str, str], Dict] = {}
+        self._live: Dict[Tuple[str, str], int] = {}
+        self._jobs: Dict[str, int] = {}
+        
+    def _check(self, target: str, tool: str) -> Dict:
+        entry = self._checks.get((target, tool))
+        if entry is None:
+            entry = self._checks[(target, tool)] = {
+                'state': 'queued', 'started': None, 'finished': None,
+                'output_bytes': 0, 'findings': {}
+            }
+        return entry
+        
+    def check_state(self, target: str, tool: str, state: str, findings: Optional[List] = None):
+        """Move a check to a new state; final states record its findings per severity"""
+        now = time.time()
+        with self._lock:
+            entry = self._check(target, tool)
+            entry['state'] = state
+            if state == 'queued':
+                entry.update(started=None, finished=None, output_bytes=0, findings={})
+            elif state == 'running':
+                entry['started'] = now
+            elif state in self.FINAL_STATES:
+                entry['finished'] = now
+                counts = {}
+                for vuln in findings or []:
+                    severity = (vuln.get('severity') or 'INFO').upper()
+                    counts[severity] = counts.get(severity, 0) + 1
+                entry['findings'] = counts
+                
+    def output(self, target: str, tool: str, nbytes: int):
+        """Count bytes of tool output (stdout and stderr)"""
+        with self._lock:
+            self._check(target, tool)['output_bytes'] += nbytes
+            
+    def live_finding(self, tool: str, severity: Optional[str]):
+        """Count a finding streamed while its tool is still running"""
+        key = (tool or 'unknown', (severity or 'INFO').upper())
+        with self._lock:
+            self._live[key] = self._live.get(key, 0) + 1
+            
+    def jobs(self, counts: Dict[str, int]):
+        """Job queue depth per status (coordinator mode)"""
+        with self._lock:
+            self._jobs = dict(counts)
+            
+    def snapshot(self) -> Dict:
+        """Point-in-time view of every metric as plain JSON-serialisable data"""
+        now = time.time()
+        with self._lock:
+            checks = []
+            states = dict.fromkeys(self.STATES, 0)
+            for (target, tool), entry in self._checks.items():
+                states[entry['state']] = states.get(entry['state'], 0) + 1
+                duration = None
+                if entry['started'] is not None:
+                    duration = round((entry['finished'] or now) - entry['started'], 3)
+                checks.append(dict(entry, target=target, tool=tool, duration=duration,
+                                   findings=dict(entry['findings'])))
+            live = {}
+            for (tool, severity), count in self._live.items():
+                live.setdefault(tool, {})[severity] = count
+            return {
+                'timestamp': datetime.fromtimestamp(now).isoformat(),
+                'uptime': round(now - self.started, 3),
+                'queue_depth': states['queued'],
+                'states': states,
+                'checks': checks,
+                'live_findings': live,
+                'jobs': dict(self._jobs)
+            }
+            
+    @staticmethod
+    def _labels(**labels) -> str:
+        """Prometheus label set, escaping backslashes, quotes and newlines"""
+        pairs = []
+        for name, value in labels.items():
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{name}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+        
+    def prometheus(self) -> str:
+        """Render the current metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{self._labels(**labels) if labels else ''} {value}")
+                
+        checks = snapshot['checks']
+        metric('vulnscan_uptime_seconds', 'gauge', 'Seconds since the scan started',
+               [({}, snapshot['uptime'])])
+        metric('vulnscan_queue_depth', 'gauge', 'Checks submitted but not yet picked up',
+               [({}, snapshot['queue_depth'])])
+        metric('vulnscan_checks', 'gauge', 'Checks per state',
+               [({'state': state}, count) for state, count in snapshot['states'].items()])
+        metric('vulnscan_tool_running', 'gauge', 'Whether a tool is running against a target',
+               [({'target': c['target'], 'tool': c['tool']}, int(c['state'] == 'running'))
+                for c in checks])
+        metric('vulnscan_tool_start_time_seconds', 'gauge', 'Unix time a tool started',
+               [({'target': c['target'], 'tool': c['tool']}, round(c['started'], 3))
+                for c in checks if c['started'] is not None])
+        metric('vulnscan_tool_end_time_seconds', 'gauge', 'Unix time a tool finished',
+               [({'target': c['target'], 'tool': c['tool']}, round(c['finished'], 3))
+                for c in checks if c['finished'] is not None])
+        metric('vulnscan_tool_duration_seconds', 'gauge', 'Tool runtime so far, or in total once finished',
+               [({'target': c['target'], 'tool': c['tool']}, c['duration'])
+                for c in checks if c['duration'] is not None])
+        metric('vulnscan_tool_output_bytes_total', 'counter', 'Bytes of output read from a tool',
+               [({'target': c['target'], 'tool': c['tool']}, c['output_bytes']) for c in checks])
+        metric('vulnscan_findings', 'gauge', 'Findings returned by finished checks per severity',
+               [({'target': c['target'], 'tool': c['tool'], 'severity': severity}, count)
+                for c in checks for severity, count in c['findings'].items()])
+        metric('vulnscan_live_findings_total', 'counter', 'Findings streamed while tools were running',
+               [({'tool': tool, 'severity': severity}, count)
+                for tool, counts in snapshot['live_findings'].items()
+                for severity, count in counts.items()])
+        if snapshot['jobs']:
+            metric('vulnscan_jobs', 'gauge', 'Distributed jobs per status',
+                   [({'status': status}, count) for status, count in snapshot['jobs'].items()])
+        return '\n'.join(lines) + '\n'
+        
+    def write_snapshot(self, path: str):
+        """Write a JSON snapshot atomically so readers never see a partial file"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[!] Could not write metrics snapshot: {e}")
+
+class MetricsReporter:
+    """
+    Publishes ScanMetrics while a scan runs: a Prometheus text endpoint
+    (/metrics, plus /snapshot.json) on a local port and/or a JSON
+    snapshot file rewritten every interval seconds and once at the end.
+    """
+    
+    def __init__(self, metrics: ScanMetrics, port: Optional[int] = None,
+                 snapshot_path: Optional[str] = None, interval: float = 10.0,
+                 host: str = '127.0.0.1'):
+        self.metrics = metrics
+        self.port = port
+        self.host = host
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self._server = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        
+    def start(self) -> 'MetricsReporter':
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            self._spawn(self._server.serve_forever, 'metrics-http')
+            print(f"[*] Metrics at http://{self.host}:{self.port}/metrics")
+        if self.snapshot_path:
+            self._spawn(self._write_periodically, 'metrics-snapshot')
+            print(f"[*] Metrics snapshots every {self.interval:g}s to {self.snapshot_path}")
+        return self
+        
+    def _spawn(self, target: Callable, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        
+    def _write_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.metrics.write_snapshot(self.snapshot_path)
+            
+    def _handler(self):
+        metrics = self.metrics
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == '/metrics':
+                    body = metrics.prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/snapshot.json':
+                    body = json.dumps(metrics.snapshot(), indent=2).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                
+            def log_message(self, format, *args):
+                pass
+                
+        return Handler
+        
+    def stop(self):
+        """Stop serving and write the final snapshot"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self.snapshot_path:
+            self.metrics.write_snapshot(self.snapshot_path)
+
+class StageProfiler:
+    """
+    --profile mode: wall time, CPU time and allocations (tracemalloc) of
+    each post-processing stage -- tool output parsing, aggregation and
+    report rendering -- and optionally a cProfile dump of the code run
+    inside them. Time spent in a nested stage is also charged to its
+    parent; the self column excludes it. Allocation figures are
+    approximate while stages overlap on several threads.
+    """
+    
+    def __init__(self, cprofile_path: Optional[str] = None, trace_memory: bool = True):
+        self.cprofile_path = cprofile_path
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats: Dict[str, Dict] = {}
+        self._profiles: List[cProfile.Profile] = []
+        self._active = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            
+    def _thread_profile(self) -> cProfile.Profile:
+        profile = getattr(self._local, 'profile', None)
+        if profile is None:
+            profile = self._local.profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+        return profile
+        
+    @contextmanager
+    def stage(self, name: str):
+        """Measure the enclosed block as one call of the named stage"""
+        stack = self._local.__dict__.setdefault('stack', [])
+        profile = None
+        if self.cprofile_path and not stack:
+            profile = self._thread_profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process
+                profile = None
+        memory_start = 0
+        if self.trace_memory:
+            with self._lock:
+                if not self._active:
+                    tracemalloc.reset_peak()
+                self._active += 1
+            memory_start = tracemalloc.get_traced_memory()[0]
+            
+        frame = {'wall': 0.0, 'cpu': 0.0}
+        stack.append(frame)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            stack.pop()
+            if stack:
+                stack[-1]['wall'] += wall
+                stack[-1]['cpu'] += cpu
+            if profile is not None:
+                profile.disable()
+            allocated = peak = 0
+            if self.trace_memory:
+                current, peak_memory = tracemalloc.get_traced_memory()
+                allocated = current - memory_start
+                peak = peak_memory - memory_start
+                
+            with self._lock:
+                if self.trace_memory:
+                    self._active -= 1
+                entry = self._stats.setdefault(name, {
+                    'calls': 0, 'wall': 0.0, 'self_wall': 0.0, 'cpu': 0.0, 'self_cpu': 0.0,
+                    'allocated': 0, 'peak': 0
+                })
+                entry['calls'] += 1
+                entry['wall'] += wall
+                entry['self_wall'] += wall - frame['wall']
+                entry['cpu'] += cpu
+                entry['self_cpu'] += cpu - frame['cpu']
+                entry['allocated'] += allocated
+                entry['peak'] = max(entry['peak'], peak)
+                
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """Wrap a callback (e.g. a per-line output handler) in a stage"""
+        def profiled(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return profiled
+        
+    def stats(self) -> Dict[str, Dict]:
+        """Per-stage totals, most self time first"""
+        with self._lock:
+            entries = {name: dict(entry) for name, entry in self._stats.items()}
+        return dict(sorted(entries.items(), key=lambda item: item[1]['self_wall'], reverse=True))
+        
+    def report(self) -> str:
+        """Per-stage breakdown as a text table"""
+        stats = self.stats()
+        if not stats:
+            return "[*] Profile: no post-processing stages ran"
+        mib = 1024 * 1024
+        header = f"    {'stage':<20} {'calls':>9} {'wall':>9} {'self':>9} {'cpu':>9} {'self cpu':>9}"
+        if self.trace_memory:
+            title = ("[*] Post-processing profile (seconds; alloc: MiB still held, summed over calls; "
+                     "peak: largest MiB rise within one call)")
+            header += f" {'alloc':>9} {'peak':>9}"
+        else:
+            title = "[*] Post-processing profile (seconds; allocation tracking off)"
+        lines = [title, header]
+        for name, entry in stats.items():
+            line = (
+                f"    {name:<20} {entry['calls']:>9} {entry['wall']:>9.3f} {entry['self_wall']:>9.3f} "
+                f"{entry['cpu']:>9.3f} {entry['self_cpu']:>9.3f}"
+            )
+            if self.trace_memory:
+                line += f" {entry['allocated'] / mib:>9.2f} {entry['peak'] / mib:>9.2f}"
+            lines.append(line)
+        lines.append(
+            f"    {'total (self)':<20} {sum(e['calls'] for e in stats.values()):>9} {'':>9} "
+            f"{sum(e['self_wall'] for e in stats.values()):>9.3f} {'':>9} "
+            f"{sum(e['self_cpu'] for e in stats.values()):>9.3f}"
+        )
+        return '\n'.join(lines)
+        
+    def dump(self) -> Optional[str]:
+        """Write the merged cProfile data of every thread; returns the path"""
+        with self._lock:
+            profiles = [profile for profile in self._profiles if profile.getstats()]
+        if not self.cprofile_path or not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(self.cprofile_path)
+        return self.cprofile_path
+
+class ScanProfile:
+    """
+    Declarative scan profile: which tools run, with what arguments,
+    timeouts and concurrency, and what each is expected to cost and be
+    worth. Profiles come from SCAN_PROFILES or a JSON file of the same
+    shape; a profile may "extend" another and override some of its tools.
+    """
+    
+    CHECKS = ('header_check', 'sql_check', 'nmap', 'nikto', 'testssl', 'nuclei', 'gobuster', 'dirfuzz')
+    
+    def __init__(self, name: str, tools: Dict[str, Dict], description: str = '',
+                 concurrency: Optional[int] = None):
+        unknown = sorted(set(tools) - set(self.CHECKS))
+        if unknown:
+            raise ValueError(f"profile '{name}' has unknown tools: {', '.join(unknown)}")
+        self.name = name
+        self.tools = tools
+        self.description = description
+        self.concurrency = concurrency
+        
+    @classmethod
+    def load(cls, filename: Optional[str] = None) -> Dict[str, 'ScanProfile']:
+        """Built-in profiles plus any from a JSON file, which may replace them"""
+        definitions = dict(SCAN_PROFILES)
+        if filename:
+            with open(filename, 'r') as f:
+                definitions.update(json.load(f))
+                
+        def resolve(name: str, seen: Tuple[str, ...] = ()) -> Dict:
+            if name in seen:
+                raise ValueError(f"profile '{name}' extends itself")
+            definition = definitions[name]
+            base = definition.get('extends')
+            if not base:
+                return definition
+            if base not in definitions:
+                raise ValueError(f"profile '{name}' extends unknown profile '{base}'")
+            parent = resolve(base, seen + (name,))
+            tools = {tool: dict(options) for tool, options in parent['tools'].items()}
+            for tool, options in definition.get('tools', {}).items():
+                if options is None:
+                    tools.pop(tool, None)
+                else:
+                    tools.setdefault(tool, {}).update(options)
+            return dict(parent, **{k: v for k, v in definition.items() if k != 'tools'}, tools=tools)
+            
+        profiles = {}
+        for name in definitions:
+            definition = resolve(name)
+            profiles[name] = cls(
+                name, definition.get('tools', {}),
+                description=definition.get('description', ''),
+                concurrency=definition.get('concurrency')
+            )
+        return profiles
+        
+    def includes(self, tool: str) -> bool:
+        return tool in self.tools
+        
+    def args(self, tool: str) -> List[str]:
+        return [str(arg) for arg in self.tools.get(tool, {}).get('args', [])]
+        
+    def timeout(self, tool: str) -> int:
+        return int(self.tools.get(tool, {}).get('timeout') or DEFAULT_TOOL_TIMEOUTS.get(tool, 600))
+        
+    def tool_concurrency(self, tool: str, default: int) -> int:
+        return int(self.tools.get(tool, {}).get('concurrency') or default)
+        
+    def cost(self, tool: str) -> float:
+        return float(self.tools.get(tool, {}).get('cost') or DEFAULT_TOOL_TIMEOUTS.get(tool, 30))
+        
+    def value(self, tool: str) -> float:
+        return float(self.tools.get(tool, {}).get('value', 1))
+        
+    def select(self, tools: List[str], budget: float, slots: int,
+               cost: Callable[[str], float]) -> List[str]:
+        """
+        Highest-value subset of tools whose critical path fits the budget:
+        the longest tool and the total cost spread over the slots must both
+        fit. Profiles have a handful of tools, so every subset is tried.
+        """
+        costs = [cost(tool) for tool in tools]
+        best, best_value, best_cost = [], 0.0, 0.0
+        for mask in range(1, 1 << len(tools)):
+            chosen = [i for i in range(len(tools)) if mask >> i & 1]
+            total = sum(costs[i] for i in chosen)
+            if max(costs[i] for i in chosen) > budget or total / max(1, slots) > budget:
+                continue
+            value = sum(self.value(tools[i]) for i in chosen)
+            if value > best_value or (value == best_value and total < best_cost):
+                best, best_value, best_cost = chosen, value, total
+        return [tools[i] for i in best]
+
+class Finding:
+    """
+    Compact record for one finding. Core fields live in slots instead of a
+    per-finding dict; it still answers get()/[] so report code can treat it
+    like the dicts the checks return.
+    """
+    
+    __slots__ = FINDING_FIELDS + ('extra', 'identifiers', 'sources', '_fingerprint')
+    
+    def __init__(self, **fields):
+        for field in FINDING_FIELDS:
+            setattr(self, field, fields.pop(field, None))
+        self.extra = fields or None
+        self.identifiers = None
+        self.sources = None
+        self._fingerprint = None
+        
+    @classmethod
+    def from_dict(cls, vuln: Dict) -> 'Finding':
+        """Build a finding from a check's result dict, normalizing severity"""
+        fields = dict(vuln)
+        severity = str(fields.get('severity') or 'INFO').upper()
+        fields['severity'] = severity if severity in SEVERITY_ORDER else 'INFO'
+        for field in INTERNED_FIELDS:
+            value = fields.get(field)
+            if isinstance(value, str):
+                fields[field] = sys.intern(value)
+        finding = cls(**fields)
+        finding.identifiers = canonical_identifiers(finding) or None
+        return finding
+        
+    def to_dict(self) -> Dict:
+        """Plain dict for JSON output"""
+        vuln = {}
+        for field in FINDING_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                vuln[field] = value
+        if self.extra:
+            vuln.update(self.extra)
+        if self.identifiers:
+            vuln['identifiers'] = self.identifiers
+        if self.sources:
+            vuln['sources'] = self.sources
+        return vuln
+        
+    def provenance(self) -> Dict:
+        """What this finding contributed when it is merged into another"""
+        source = {'fingerprint': self.fingerprint}
+        for field in ('tool', 'type', 'severity', 'host') + tuple(IDENTITY_FIELDS) + ('description',):
+            value = getattr(self, field)
+            if value is not None:
+                source[field] = value
+        return source
+        
+    def fingerprints(self) -> List[str]:
+        """Own fingerprint plus those of findings correlated into this one"""
+        if not self.sources:
+            return [self.fingerprint]
+        return [source['fingerprint'] for source in self.sources]
+        
+    def get(self, key: str, default=None):
+        if key in FINDING_FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+        
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+        
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+        
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = finding_fingerprint(self)
+        return self._fingerprint
+        
+    def __repr__(self):
+        return f"Finding({self.severity} {self.tool}: {self.type} @ {self.host})"
+
+class FindingStore:
+    """
+    Deduplicated findings for a scan, indexed by fingerprint, severity, tool
+    and host. Adding and looking up a finding are O(1); severity ordering
+    walks the per-severity buckets instead of sorting.
+    
+    With correlation on, a finding sharing a canonical identifier (CVE, CWE
+    at a location, header, port) with a stored finding on the same host is
+    merged into it instead of stored separately. The merged finding keeps
+    the highest severity and a provenance record for each source. A
+    finding is indexed under its address and, where known, its host name:
+    an nmap finding matches a URL finding on either the IP or the name
+    (its 'hostname' field, or an alias registered with alias_host()).
+    """
+    
+    INDEXED_FIELDS = ('severity', 'tool', 'host')
+    
+    def __init__(self, correlate: bool = True):
+        self.correlate = correlate
+        self._by_fingerprint: Dict[str, Finding] = {}
+        self._aliases: Dict[str, str] = {}
+        self._by_identifier: Dict[Tuple[str, str], Finding] = {}
+        self._host_aliases: Dict[str, str] = {}
+        self._indexes: Dict[str, Dict[str, Dict[str, Finding]]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+        
+    def add(self, finding: Finding) -> bool:
+        """Store a finding; False if it duplicates or was merged into a stored one"""
+        fingerprint = finding.fingerprint
+        if fingerprint in self._by_fingerprint or fingerprint in self._aliases:
+            return False
+            
+        keys = []
+        if self.correlate and finding.identifiers:
+            keys = [
+                (host, identifier)
+                for host in self.correlation_hosts(finding)
+                for identifier in finding.identifiers
+            ]
+            for key in keys:
+                primary = self._by_identifier.get(key)
+                if primary is not None:
+                    self._merge(primary, finding, keys)
+                    return False
+                    
+        self._by_fingerprint[fingerprint] = finding
+        for key in keys:
+            self._by_identifier[key] = finding
+        for field, index in self._indexes.items():
+            index.setdefault(getattr(finding, field), {})[fingerprint] = finding
+        return True
+        
+    def alias_host(self, address: str, name: str):
+        """Correlate findings on an address as findings on the named host"""
+        self._host_aliases[host_key(address)] = host_key(name)
+        
+    def correlation_hosts(self, finding: Finding) -> List[str]:
+        """Hosts a finding is correlated under: its address and any name for it"""
+        host = host_key(finding.host)
+        hosts = [host]
+        for name in (self._host_aliases.get(host), finding.get('hostname')):
+            name = host_key(name) if name else None
+            if name and name not in hosts:
+                hosts.append(name)
+        return hosts
+        
+    def _merge(self, primary: Finding, finding: Finding, keys: List[Tuple[str, str]]):
+        """Fold a correlated finding into the stored one it matches"""
+        if primary.sources is None:
+            primary.sources = [primary.provenance()]
+        primary.sources.append(finding.provenance())
+        self._aliases[finding.fingerprint] = primary.fingerprint
+        
+        for key in keys:
+            if key not in self._by_identifier:
+                self._by_identifier[key] = primary
+                if key[1] not in primary.identifiers:
+                    primary.identifiers.append(key[1])
+                
+        if SEVERITY_ORDER[finding.severity] < SEVERITY_ORDER[primary.severity]:
+            severities = self._indexes['severity']
+            del severities[primary.severity][primary.fingerprint]
+            primary.severity = finding.severity
+            severities.setdefault(primary.severity, {})[primary.fingerprint] = primary
+        if not primary.description:
+            primary.description = finding.description
+        if not primary.recommendation:
+            primary.recommendation = finding.recommendation
+        self._indexes['tool'].setdefault(finding.tool, {})[primary.fingerprint] = primary
+        
+    def add_dict(self, vuln: Dict) -> Optional[Finding]:
+        """Store a check's result dict; returns the new Finding, or None if not stored separately"""
+        finding = Finding.from_dict(vuln)
+        return finding if self.add(finding) else None
+        
+    def get(self, fingerprint: str) -> Optional[Finding]:
+        """Stored finding by fingerprint, following merged findings to their primary"""
+        return self._by_fingerprint.get(self._aliases.get(fingerprint, fingerprint))
+        
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._by_fingerprint or fingerprint in self._aliases
+        
+    def __len__(self) -> int:
+        return len(self._by_fingerprint)
+        
+    def __iter__(self):
+        return iter(self._by_fingerprint.values())
+        
+    def items(self):
+        """(fingerprint, finding) pairs in insertion order"""
+        return self._by_fingerprint.items()
+        
+    def correlated(self) -> List[Finding]:
+        """Findings that more than one source reported"""
+        return [finding for finding in self if finding.sources]
+        
+    def by_severity(self, severity: str) -> List[Finding]:
+        return list(self._indexes['severity'].get(severity.upper(), {}).values())
+        
+    def by_tool(self, tool: str) -> List[Finding]:
+        return list(self._indexes['tool'].get(tool, {}).values())
+        
+    def by_host(self, host: str) -> List[Finding]:
+        return list(self._indexes['host'].get(host, {}).values())
+        
+    def group_by(self, field: str) -> Dict[str, List[Finding]]:
+        """Findings grouped by a field's value; indexed fields need no pass over findings"""
+        if field in self._indexes:
+            return {value: list(bucket.values()) for value, bucket in self._indexes[field].items()}
+        groups = {}
+        for finding in self:
+            groups.setdefault(finding.get(field), []).append(finding)
+        return groups
+        
+    def counts(self) -> Dict[str, int]:
+        """Finding count per severity, keyed like the report summary"""
+        index = self._indexes['severity']
+        return {severity.lower(): len(index.get(severity, {})) for severity in SEVERITY_ORDER}
+        
+    def sorted_by_severity(self):
+        """Iterate findings most severe first, in discovery order within a severity"""
+        index = self._indexes['severity']
+        return chain.from_iterable(index.get(severity, {}).values() for severity in SEVERITY_ORDER)
+
+class BaselineStore:
+    """
+    Previous findings for a target, keyed by finding fingerprint, used to
+    report only what changed between runs.
+    """
+    
+    # Fields kept per baseline finding; enough to describe a resolved issue
+    SUMMARY_FIELDS = ['tool', 'type', 'severity', 'host'] + IDENTITY_FIELDS + ['description']
+    
+    def __init__(self, target: str, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(CACHE_DIR, 'baselines')
+        name = hashlib.sha256(target.encode()).hexdigest()[:16]
+        self.path = os.path.join(self.directory, f"{name}.json")
+        self.target = target
+        
+    def load(self) -> Optional[Dict[str, Dict]]:
+        """Baseline findings by fingerprint, or None if no baseline exists yet"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('findings', {})
+        except (OSError, ValueError):
+            return None
+            
+    def save(self, store: FindingStore):
+        """Replace the baseline with the given findings"""
+        findings = {}
+        for finding in store:
+            # Correlated findings keep every source's fingerprint, so the
+            # next run matches whichever tool reports the issue first; the
+            # group ties them together so the issue resolves only once
+            for source in finding.sources or [finding.provenance()]:
+                entry = {field: source[field] for field in self.SUMMARY_FIELDS if field in source}
+                entry['group'] = finding.fingerprint
+                findings[source['fingerprint']] = entry
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'target': self.target,
+                'updated': datetime.now().isoformat(),
+                'findings': findings
+            }, f)
+        os.replace(tmp_path, self.path)
+        
+    @staticmethod
+    def diff(baseline: Dict[str, Dict], store: FindingStore) -> Dict:
+        """
+        Split current findings into new/unchanged and list resolved baseline
+        findings. A correlated baseline issue is resolved only when none of
+        its sources' fingerprints is still reported.
+        """
+        new = [
+            finding.to_dict() for finding in store
+            if not any(fp in baseline for fp in finding.fingerprints())
+        ]
+        groups: Dict[str, List[str]] = {}
+        for fp, finding in baseline.items():
+            # Baselines saved before groups existed hold one finding per entry
+            groups.setdefault(finding.get('group', fp), []).append(fp)
+        resolved = []
+        for fingerprints in groups.values():
+            if not any(fp in store for fp in fingerprints):
+                finding = dict(baseline[fingerprints[0]])
+                finding.pop('group', None)
+                resolved.append(finding)
+        return {
+            'new': new,
+            'resolved': resolved,
+            'counts': {
+                'new': len(new),
+                'resolved': len(resolved),
+                'unchanged': len(store) - len(new)
+            }
+        }
+
+class NucleiTemplateCache:
+    """
+    Tracks when nuclei templates were last updated so the update runs only
+    after a TTL, at most once per process, and never in offline mode.
+    """
+    
+    _lock = threading.Lock()
+    _attempted = False
+    
+    def __init__(self, ttl: int = 24 * 3600, offline: bool = False, path: Optional[str] = None):
+        self.ttl = ttl
+        self.offline = offline
+        self.path = path or os.path.join(CACHE_DIR, 'nuclei_templates.json')
+        
+    def last_update(self) -> float:
+        """Unix time of the last successful template update (0 if unknown)"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f).get('last_update', 0)
+        except (OSError, ValueError):
+            return 0
+            
+    def ensure_fresh(self, run_command: Callable[..., Tuple[int, str, str]]):
+        """Update templates through run_command if they are older than the TTL"""
+        if self.offline:
+            return
+        cls = type(self)
+        with cls._lock:
+            if cls._attempted:
+                return
+            cls._attempted = True
+            
+            age = time.time() - self.last_update()
+            if age < self.ttl:
+                print(f"[*] Nuclei templates updated {int(age // 60)} min ago; skipping update")
+                return
+                
+            print("[*] Updating nuclei templates...")
+            returncode, stdout, stderr = run_command(
+                ['nuclei', '-update-templates'], timeout=120, log_name='nuclei_update'
+            )
+            if returncode == 0:
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with open(self.path, 'w') as f:
+                        json.dump({'last_update': time.time()}, f)
+                except OSError as e:
+                    print(f"[!] Could not record nuclei template update: {e}")
+            else:
+                print(f"[!] Nuclei template update failed (exit {returncode}); using existing templates")
+
+class ScanCheckpoint:
+    """
+    Manifest of completed tools and their parsed findings, written to the
+    output directory after every tool so an interrupted scan can resume.
+    """
+    
+    FILENAME = 'checkpoint.json'
+    
+    def __init__(self, output_dir: str, target: str, scan_type: str, resume: bool = False):
+        self.path = os.path.join(output_dir, self.FILENAME)
+        self._lock = threading.Lock()
+        self.data = {
+            'target': target,
+            'scan_type': scan_type,
+            'started': datetime.now().isoformat(),
+            'tools': {}
+        }
+        
+        if resume:
+            previous = self.read(output_dir)
+            if previous:
+                if previous.get('target') != target or previous.get('scan_type') != scan_type:
+                    raise ValueError(
+                        f"Checkpoint in {output_dir} is for {previous.get('target')} "
+                        f"({previous.get('scan_type')}), not {target} ({scan_type})"
+                    )
+                self.data = previous
+                
+    @classmethod
+    def read(cls, output_dir: str) -> Optional[Dict]:
+        """Load a checkpoint manifest from a directory, if one exists"""
+        try:
+            with open(os.path.join(output_dir, cls.FILENAME), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+            
+    def completed(self, tool: str) -> Optional[List[Dict]]:
+        """Findings of a tool that already finished, or None if it must run"""
+        with self._lock:
+            entry = self.data['tools'].get(tool)
+            if entry and entry.get('status') == 'completed':
+                return entry.get('findings', [])
+            return None
+            
+    def record(self, tool: str, findings: List[Dict]):
+        """Mark a tool as completed and persist the manifest"""
+        with self._lock:
+            self.data['tools'][tool] = {
+                'status': 'completed',
+                'completed_at': datetime.now().isoformat(),
+                'findings': findings
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+class FindingsDatabase:
+    """
+    SQLite history of every scan's findings, one row per finding with
+    indexed scan id, target, tool, severity and fingerprint, so trend and
+    history queries do not need to reparse old JSON reports.
+    """
+    
+    SCHEMA_VERSION = 1
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scans (
+            scan_id TEXT NOT NULL,
+            target TEXT NOT NULL,
+            scan_type TEXT,
+            scan_time TEXT NOT NULL,
+            output_dir TEXT,
+            aborted TEXT,
+            critical INTEGER, high INTEGER, medium INTEGER, low INTEGER, info INTEGER,
+            total INTEGER,
+            PRIMARY KEY (scan_id, target)
+        );
+        CREATE TABLE IF NOT EXISTS findings (
+            scan_id TEXT NOT NULL,
+            target TEXT NOT NULL,
+            scan_time TEXT NOT NULL,
+            tool TEXT,
+            severity TEXT,
+            fingerprint TEXT NOT NULL,
+            type TEXT,
+            host TEXT,
+            port TEXT,
+            path TEXT,
+            description TEXT,
+            sources TEXT,
+            data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS findings_scan ON findings (scan_id, target);
+        CREATE INDEX IF NOT EXISTS findings_target ON findings (target, scan_time);
+        CREATE INDEX IF NOT EXISTS findings_tool ON findings (tool);
+        CREATE INDEX IF NOT EXISTS findings_severity ON findings (severity, scan_time);
+        CREATE INDEX IF NOT EXISTS findings_fingerprint ON findings (fingerprint);
+        CREATE INDEX IF NOT EXISTS scans_time ON scans (scan_time);
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_DIR, 'findings.db')
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        finally:
+            conn.close()
+            
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call; WAL lets concurrent scans
+        # append while queries read
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+        
+    def record(self, scanner: 'VulnerabilityScanner'):
+        """Append a finished scan and its findings, replacing any earlier copy of it"""
+        results = scanner.results
+        summary = results['summary']
+        scan_time = results['timestamp']
+        key = (scanner.scan_id, scanner.target)
+        
+        rows = (
+            (
+                scanner.scan_id, scanner.target, scan_time,
+                finding.tool, finding.severity, finding.fingerprint, finding.type,
+                finding.host, None if finding.port is None else str(finding.port),
+                finding.path, finding.description,
+                ','.join(sorted({source['tool'] for source in finding.sources})) if finding.sources else None,
+                json.dumps(finding.to_dict())
+            )
+            for finding in scanner.findings
+        )
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM findings WHERE scan_id = ? AND target = ?", key)
+                conn.execute(
+                    "INSERT OR REPLACE INTO scans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    key + (scanner.scan_type, scan_time, scanner.output_dir, results.get('aborted'),
+                           summary['critical'], summary['high'], summary['medium'],
+                           summary['low'], summary['info'], len(scanner.findings))
+                )
+                conn.executemany(
+                    "INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+        finally:
+            conn.close()
+            
+    def query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        """Run a read-only query against the history"""
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+            
+    def hosts_with(self, severity: str, since: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Hosts with findings of a severity since an ISO date, with finding counts"""
+        return self.query(
+            "SELECT host, COUNT(DISTINCT fingerprint) FROM findings "
+            "WHERE severity = ? AND scan_time >= ? GROUP BY host ORDER BY 2 DESC",
+            (severity.upper(), since or '')
+        )
+        
+    def trend(self, target: str) -> List[Tuple]:
+        """Per-scan severity counts for a target, oldest first"""
+        return self.query(
+            "SELECT scan_time, critical, high, medium, low, info, total FROM scans "
+            "WHERE target = ? ORDER BY scan_time",
+            (target,)
+        )
+        
+    def history(self, fingerprint: str) -> List[Tuple[str, str, str]]:
+        """Scans in which a finding was seen, oldest first"""
+        return self.query(
+            "SELECT scan_time, target, severity FROM findings "
+            "WHERE fingerprint = ? ORDER BY scan_time",
+            (fingerprint,)
+        )
 
 class VulnerabilityScanner:
-    def __init__(self, target: str, scan_type: str = 'full'):
+    def __init__(self, target: str, scan_type: str = 'full', output_dir: Optional[str] = None,
+                 tool_slots: Optional[Dict[str, threading.Semaphore]] = None,
+                 max_concurrent_checks: int = 4,
+                 command_runner: Optional[CommandRunner] = None,
+                 tool_cache: Optional['ToolProbeCache'] = None,
+                 nmap_workers: int = 1, nmap_shard_size: int = 16,
+                 nmap_shard_by: str = 'hosts', nmap_ports: str = '1-65535',
+                 resume: bool = False,
+                 result_cache: Optional['ResultCache'] = None,
+                 build_id: Optional[str] = None,
+                 fingerprint_header: Optional[str] = None,
+                 diff_mode: bool = False, update_baseline: bool = False,
+                 baseline_dir: Optional[str] = None,
+                 http_client: Optional[HTTPClient] = None,
+                 sqli_concurrency: int = 8, sqli_rate: float = 10.0,
+                 sqli_max_points: int = 50,
+                 fail_fast_on: Optional[str] = None,
+                 abort_event: Optional[threading.Event] = None,
+                 nuclei_templates: Optional[NucleiTemplateCache] = None,
+                 fuzzer: str = 'auto', fuzz_wordlist: Optional[str] = None,
+                 fuzz_concurrency: Optional[int] = None, fuzz_rate: float = 100.0,
+                 path_classifier: Optional[PathClassifier] = None, correlate: bool = True,
+                 findings_db: Optional[FindingsDatabase] = None,
+                 runtime_history: Optional[RuntimeHistory] = None,
+                 rate_budgets: Optional[RateBudgets] = None,
+                 profile: Optional[ScanProfile] = None, time_budget: Optional[float] = None,
+                 metrics: Optional[ScanMetrics] = None,
+                 profiler: Optional[StageProfiler] = None):
         self.target = target
         self.scan_type = scan_type
+        # The scan type names a profile; the built-in ones need no file
+        if profile is None:
+            profiles = ScanProfile.load()
+            if scan_type not in profiles:
+                raise ValueError(f"Unknown scan profile '{scan_type}'")
+            profile = profiles[scan_type]
+        self.profile = profile
+        self.time_budget = time_budget
         self.results = {
             'target': target,
             'scan_type': scan_type,
             'timestamp': datetime.now().isoformat(),
-            'vulnerabilities': [],
             'summary': {
                 'critical': 0,
                 'high': 0,
@@ -36,130 +2753,315 @@ class VulnerabilityScanner:
                 'info': 0
             }
         }
+        # Findings arrive from the main thread and, for streaming tools, from
+        # the command runner's loop thread
+        self.findings = FindingStore(correlate=correlate)
+        self._target_aliased = False
+        self._findings_lock = threading.Lock()
         self.scan_id = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.output_dir = f"scan_results_{self.scan_id}"
+        self.output_dir = output_dir or f"scan_results_{self.scan_id}"
         os.makedirs(self.output_dir, exist_ok=True)
         
-    def run_command(self, command: List[str], timeout: int = 300) -> Tuple[int, str, str]:
-        """Execute system command with timeout"""
-        try:
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = process.communicate(timeout=timeout)
-            return process.returncode, stdout, stderr
-        except subprocess.TimeoutExpired:
-            process.kill()
-            return -1, "", "Command timed out"
-        except Exception as e:
-            return -1, "", str(e)
+        # Concurrency limits: checks in flight against this target, and
+        # per-tool slots that may be shared with other scanners in a batch
+        self.max_concurrent_checks = max_concurrent_checks
+        
+        # Past tool durations drive check order and timeouts; this run's
+        # durations are kept for the critical path report
+        self.runtime_history = runtime_history
+        self.tool_durations: Dict[str, float] = {}
+        self._started = None
+        self.target_slots = threading.BoundedSemaphore(max_concurrent_checks)
+        self.tool_slots = tool_slots or {}
+        
+        # External tools share one event loop; batch mode passes in a shared runner
+        self.command_runner = command_runner or CommandRunner()
+        self.tool_cache = tool_cache
+        
+        # Nmap sharding: with more than one worker, ranges are split into
+        # host or port chunks that run as parallel nmap processes
+        self.nmap_workers = nmap_workers
+        self.nmap_shard_size = nmap_shard_size
+        self.nmap_shard_by = nmap_shard_by
+        self.nmap_ports = nmap_ports
+        
+        # Completed tools are checkpointed so --resume can skip them
+        self.checkpoint = ScanCheckpoint(self.output_dir, target, scan_type, resume=resume)
+        self._tool_state = threading.local()
+        
+        # Findings cache shared between runs, keyed on a cheap target fingerprint
+        self.result_cache = result_cache
+        self.build_id = build_id
+        self.fingerprint_header = fingerprint_header
+        self._target_fingerprint = None
+        self._fingerprint_lock = threading.Lock()
+        
+        # Differential mode compares against the stored baseline for this target
+        self.diff_mode = diff_mode
+        self.update_baseline = update_baseline
+        self.baseline = BaselineStore(target, baseline_dir)
+        self.findings_db = findings_db
+        
+        # In-process checks share one pooled client and fetch the base page once
+        self.http = http_client or HTTPClient(budgets=rate_budgets)
+        # Per-host request budget; in-process requests draw from it through
+        # the HTTP client, external tools get rate flags derived from it
+        self.rate_budgets = rate_budgets or self.http.budgets
+        self._base_response = None
+        self._base_error = None
+        self._base_lock = threading.Lock()
+        
+        # SQL injection probing: concurrent requests under a rate limit
+        self.sqli_concurrency = sqli_concurrency
+        self.sqli_limiter = RateLimiter(sqli_rate)
+        self.sqli_max_points = sqli_max_points
+        
+        # Live findings: streamed to live_findings.jsonl as tools report them.
+        # With fail_fast_on set, the first finding at or above that severity
+        # sets abort_event (shared across a batch) and kills running tools.
+        self.fail_fast_on = fail_fast_on.upper() if fail_fast_on else None
+        self.abort_event = abort_event or threading.Event()
+        self.abort_reason = None
+        self.live_count = 0
+        self._live_lock = threading.Lock()
+        
+        self.nuclei_templates = nuclei_templates or NucleiTemplateCache()
+        
+        # Directory fuzzing: gobuster, the built-in fuzzer, or whichever is available
+        self.fuzzer = fuzzer
+        self.fuzz_wordlist = fuzz_wordlist
+        self.fuzz_concurrency = fuzz_concurrency
+        self.fuzz_rate = fuzz_rate
+        self.path_classifier = path_classifier or PathClassifier()
+        
+        # Optional live instrumentation (check states, output volume, findings)
+        self.metrics = metrics
+        # --profile: time and allocations of parsing, aggregation and reports
+        self.profiler = profiler
+        
+    def run_command(self, command: List[str], timeout: int = 300,
+                    on_stdout: Optional[Callable[[str], None]] = None,
+                    on_stderr: Optional[Callable[[str], None]] = None,
+                    log_name: Optional[str] = None,
+                    stdout_path: Optional[str] = None) -> Tuple[int, str, str]:
+        """
+        Execute system command with timeout, streaming output line by line.
+        Returns the exit code and the last lines of stdout/stderr; when
+        log_name is set the full streams are written to the output directory
+        (stdout_path overrides where stdout is saved).
+        """
+        stderr_path = None
+        if log_name:
+            stdout_path = stdout_path or f"{self.output_dir}/{log_name}.stdout.log"
+            stderr_path = f"{self.output_dir}/{log_name}.stderr.log"
+        result = self.command_runner.run(
+            command, timeout,
+            on_stdout=on_stdout, on_stderr=on_stderr,
+            stdout_path=stdout_path, stderr_path=stderr_path,
+            on_bytes=self._output_counter(getattr(self._tool_state, 'tool', None))
+        )
+        self._note_returncode(result[0])
+        return result
+        
+    def _output_counter(self, tool: Optional[str]) -> Optional[Callable[[int], None]]:
+        """Callback that counts a tool's output bytes, if metrics are enabled"""
+        if self.metrics is None or tool is None:
+            return None
+        return lambda nbytes: self.metrics.output(self.target, tool, nbytes)
+        
+    def _stage(self, name: str):
+        """Profiler stage context for a post-processing step (no-op unless --profile)"""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+        
+    def _profiled(self, name: str, func: Callable) -> Callable:
+        """Output handler wrapped in a profiler stage when profiling"""
+        return self.profiler.wrap(name, func) if self.profiler else func
+        
+    def _record_check(self, tool: str, state: str, findings: Optional[List] = None):
+        if self.metrics is not None:
+            self.metrics.check_state(self.target, tool, state, findings)
             
-    def check_tool_availability(self) -> Dict[str, bool]:
-        """Check which security tools are available"""
-        tools = {
-            'nmap': ['nmap', '--version'],
-            'nikto': ['nikto', '-Version'],
-            'sqlmap': ['sqlmap', '--version'],
-            'gobuster': ['gobuster', 'version'],
-            'testssl': ['testssl', '--version'],
-            'nuclei': ['nuclei', '-version'],
-            'rustscan': ['rustscan', '--version'],
-            'ffuf': ['ffuf', '-V']
-        }
+    def _note_returncode(self, returncode: int):
+        """Flag the running check as incomplete if a tool timed out or was killed"""
+        if returncode < 0:
+            self._tool_state.incomplete = True
+            
+    def required_tools(self) -> List[str]:
+        """External tools this target and scan profile would use"""
+        tools = ['nmap', 'nuclei']
+        if self.target.startswith('http'):
+            tools.append('nikto')
+            if self.fuzzer != 'native':
+                tools.append('gobuster')
+        if self.target.startswith('https'):
+            tools.append('testssl')
+        return [tool for tool in tools if self.profile.includes(tool)]
         
-        available = {}
-        for tool, command in tools.items():
-            try:
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                available[tool] = result.returncode == 0
-            except:
-                available[tool] = False
-                
-        return available
+    def check_tool_availability(self, tools: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Check which security tools are available (all known tools by default)"""
+        if self.tool_cache is None:
+            self.tool_cache = ToolProbeCache(command_runner=self.command_runner)
+        return self.tool_cache.resolve(tools if tools is not None else list(TOOL_PROBES))
+        
+    def _nmap_command(self) -> List[str]:
+        """Base nmap command for the scan profile, without targets or output"""
+        return ['nmap'] + self.profile.args('nmap')
+        
+    def _nmap_shards(self) -> List[List[str]]:
+        """Per-shard nmap arguments (ports and targets); a single entry means no sharding"""
+        hosts = nmap_host(self.target)
+        if self.nmap_workers <= 1:
+            return [hosts.split(',')]
+            
+        if self.nmap_shard_by == 'ports':
+            targets = hosts.split(',')
+            return [
+                ['-p', ports] + targets
+                for ports in split_port_range(self.nmap_ports, self.nmap_workers)
+            ]
+        return split_hosts(hosts, self.nmap_shard_size)
         
     def nmap_scan(self) -> List[Dict]:
         """Perform Nmap vulnerability scan"""
         print("[*] Running Nmap scan...")
-        vulnerabilities = []
         
-        # Define Nmap commands for different scan types
-        if self.scan_type == 'quick':
-            nmap_cmd = [
-                'nmap', '-sV', '-T4', '--top-ports', '1000',
-                '-oX', f"{self.output_dir}/nmap_scan.xml",
-                self.target
-            ]
-        else:
-            nmap_cmd = [
-                'nmap', '-sV', '-sC', '-O', '-A',
-                '--script', 'vuln,exploit,auth,default',
-                '-oX', f"{self.output_dir}/nmap_scan.xml",
-                self.target
-            ]
+        shards = self._nmap_shards()
+        if len(shards) > 1:
+            return self._nmap_sharded_scan(shards)
             
-        returncode, stdout, stderr = self.run_command(nmap_cmd, timeout=600)
+        # XML goes to stdout so hosts can be parsed while nmap is still scanning
+        nmap_cmd = self._nmap_command() + ['-oX', '-'] + shards[0]
+            
+        parser = NmapXMLParser(on_host=self._report_nmap_host)
+        returncode, stdout, stderr = self.run_command(
+            nmap_cmd, timeout=self.tool_timeout('nmap'),
+            on_stdout=self._profiled('parse.nmap', parser.feed), log_name='nmap',
+            stdout_path=f"{self.output_dir}/nmap_scan.xml"
+        )
+        with self._stage('parse.nmap'):
+            parser.close()
         
-        if returncode == 0:
-            # Parse Nmap XML output
-            try:
-                tree = ET.parse(f"{self.output_dir}/nmap_scan.xml")
-                root = tree.getroot()
-                
-                for host in root.findall('.//host'):
-                    ip = host.find('.//address[@addrtype="ipv4"]').get('addr')
+        if returncode != 0:
+            # Failed runs are not checkpointed or cached, so they rerun
+            print(f"[!] Nmap exited with code {returncode}; keeping {len(parser.vulnerabilities)} findings parsed so far")
+            self._tool_state.incomplete = True
+            
+        return parser.vulnerabilities
+        
+    def _nmap_sharded_scan(self, shards: List[List[str]]) -> List[Dict]:
+        """Run nmap shards as a bounded set of parallel processes and merge the results"""
+        print(f"[*] Nmap: {len(shards)} shards by {self.nmap_shard_by}, {self.nmap_workers} workers")
+        base_cmd = self._nmap_command()
+        if self.nmap_shard_by == 'ports' and '--top-ports' in base_cmd:
+            index = base_cmd.index('--top-ports')
+            del base_cmd[index:index + 2]
+            
+        parsers = [NmapXMLParser(on_host=self._report_nmap_host) for _ in shards]
+        shard_files = [f"{self.output_dir}/nmap_shard_{i:03d}.xml" for i in range(len(shards))]
+        # Shards are timed as one nmap run, so its timeout bounds each shard
+        timeout = self.tool_timeout('nmap')
+        
+        on_bytes = self._output_counter(getattr(self._tool_state, 'tool', None))
+        
+        async def run_shards():
+            workers = asyncio.Semaphore(self.nmap_workers)
+            
+            async def run_shard(i: int):
+                async with workers:
+                    return await self.command_runner.run_async(
+                        base_cmd + ['-oX', '-'] + shards[i],
+                        timeout=timeout,
+                        on_stdout=self._profiled('parse.nmap', parsers[i].feed),
+                        stdout_path=shard_files[i],
+                        stderr_path=f"{self.output_dir}/nmap_shard_{i:03d}.stderr.log",
+                        on_bytes=on_bytes
+                    )
                     
-                    # Check for open ports
-                    for port in host.findall('.//port'):
-                        if port.find('state').get('state') == 'open':
-                            port_id = port.get('portid')
-                            protocol = port.get('protocol')
-                            service = port.find('service')
-                            service_name = service.get('name', 'unknown') if service is not None else 'unknown'
-                            
-                            # Check for vulnerable services
-                            vuln_services = ['telnet', 'ftp', 'vnc', 'rdp', 'smb']
-                            if service_name.lower() in vuln_services:
-                                vulnerabilities.append({
-                                    'tool': 'nmap',
-                                    'type': 'Insecure Service',
-                                    'severity': 'HIGH',
-                                    'host': ip,
-                                    'port': f"{port_id}/{protocol}",
-                                    'service': service_name,
-                                    'description': f"Potentially insecure service {service_name} detected",
-                                    'recommendation': f"Disable {service_name} or use secure alternative"
-                                })
-                                
-                    # Parse script results
-                    for script in host.findall('.//script'):
-                        script_id = script.get('id')
-                        output = script.get('output', '')
-                        
-                        # Check for specific vulnerabilities
-                        if 'VULNERABLE' in output or 'vulnerable' in output:
-                            vulnerabilities.append({
-                                'tool': 'nmap',
-                                'type': 'Script Detection',
-                                'severity': 'HIGH',
-                                'host': ip,
-                                'script': script_id,
-                                'description': output.strip(),
-                                'recommendation': 'Review and patch identified vulnerability'
-                            })
-                            
-            except Exception as e:
-                print(f"[!] Error parsing Nmap results: {e}")
+            return await asyncio.gather(*[run_shard(i) for i in range(len(shards))])
+            
+        results = asyncio.run_coroutine_threadsafe(run_shards(), self.command_runner.loop).result()
+        
+        for i, (returncode, stdout, stderr) in enumerate(results):
+            self._note_returncode(returncode)
+            with self._stage('parse.nmap'):
+                parsers[i].close()
+            if returncode != 0:
+                print(f"[!] Nmap shard {i} exited with code {returncode}: {stderr.strip()[:200]}")
+                self._tool_state.incomplete = True
                 
+        with self._stage('merge.nmap'):
+            self._merge_nmap_xml(shard_files, f"{self.output_dir}/nmap_scan.xml")
+            
+            # Hosts and host scripts can be reported by more than one shard
+            seen = set()
+            vulnerabilities = []
+            for parser in parsers:
+                for vuln in parser.vulnerabilities:
+                    key = (vuln['type'], vuln['host'], vuln.get('port'), vuln.get('script'), vuln['description'])
+                    if key not in seen:
+                        seen.add(key)
+                        vulnerabilities.append(vuln)
         return vulnerabilities
         
+    @staticmethod
+    def _merge_nmap_xml(shard_files: List[str], filename: str):
+        """Stream the <host> elements of every shard into one nmap XML document"""
+        with open(filename, 'w') as out:
+            out.write('<?xml version="1.0" encoding="UTF-8"?>\n<nmaprun scanner="nmap" merged="true">\n')
+            for shard_file in shard_files:
+                if not os.path.exists(shard_file):
+                    continue
+                try:
+                    for event, elem in ET.iterparse(shard_file, events=('end',)):
+                        if elem.tag == 'host':
+                            out.write(ET.tostring(elem, encoding='unicode'))
+                            elem.clear()
+                except ET.ParseError:
+                    # Truncated shard (timed out); hosts before the break are kept
+                    pass
+            out.write('</nmaprun>\n')
+            
+    def _report_nmap_host(self, ip: str, findings: List[Dict]):
+        """Announce findings for a host as soon as nmap finishes it"""
+        if findings:
+            print(f"[+] Nmap: {len(findings)} findings on {ip}")
+        for vuln in findings:
+            self.emit_finding(vuln, quiet=True)
+            
+    def emit_finding(self, vuln: Dict, quiet: bool = False):
+        """Publish a finding the moment a tool reports it"""
+        with self._stage('emit'):
+            self._emit_finding(vuln, quiet)
+            
+    def _emit_finding(self, vuln: Dict, quiet: bool):
+        with self._live_lock:
+            self.live_count += 1
+            if self.metrics is not None:
+                self.metrics.live_finding(vuln.get('tool'), vuln.get('severity'))
+            with open(f"{self.output_dir}/live_findings.jsonl", 'a') as f:
+                f.write(json.dumps(vuln) + '\n')
+        if not quiet:
+            print(f"[+] {vuln.get('tool')}: [{vuln.get('severity', 'INFO')}] "
+                  f"{vuln.get('name') or vuln.get('type', 'Unknown')} @ {vuln.get('host', 'N/A')}")
+        self._check_fail_fast([vuln])
+        
+    def _check_fail_fast(self, findings: List[Dict]):
+        """Abort the scan if a finding reaches the --fail-fast-on severity"""
+        if not self.fail_fast_on or self.abort_event.is_set():
+            return
+        threshold = SEVERITY_ORDER.get(self.fail_fast_on, 0)
+        for vuln in findings:
+            severity = vuln.get('severity', 'INFO')
+            if SEVERITY_ORDER.get(severity, 5) <= threshold:
+                self.abort_reason = (
+                    f"{severity} finding from {vuln.get('tool')}: "
+                    f"{vuln.get('name') or vuln.get('description', '')[:100]}"
+                )
+                print(f"\n[!] Fail-fast: {self.abort_reason}; aborting scan")
+                self.abort_event.set()
+                self.command_runner.cancel_all()
+                return
+            
     def nikto_scan(self) -> List[Dict]:
         """Perform Nikto web vulnerability scan"""
         print("[*] Running Nikto scan...")
@@ -168,28 +3070,28 @@ class VulnerabilityScanner:
         nikto_cmd = [
             'nikto', '-h', self.target,
             '-output', f"{self.output_dir}/nikto_scan.json",
-            '-Format', 'json',
-            '-Tuning', '123456789' if self.scan_type == 'full' else '12'
-        ]
+            '-Format', 'json'
+        ] + self.profile.args('nikto')
+        rate = self.tool_rate()
+        if rate:
+            nikto_cmd.extend(['-Pause', f"{1 / rate:.3f}"])
         
-        returncode, stdout, stderr = self.run_command(nikto_cmd, timeout=900)
+        # Stdout is only inspected as a fallback for nikto builds that do not
+        # write JSON; matching lines are deduplicated as they stream in
+        fallback = NiktoParser(self.target)
+        returncode, stdout, stderr = self.run_command(
+            nikto_cmd, timeout=self.tool_timeout('nikto'),
+            on_stdout=self._profiled('parse.nikto', fallback.add_text_line), log_name='nikto'
+        )
         
-        if returncode == 0:
-            # Parse Nikto results
-            try:
-                # Nikto output parsing (simplified - real implementation would be more robust)
-                for line in stdout.split('\n'):
-                    if '+ OSVDB-' in line or '+ CVE-' in line:
-                        vulnerabilities.append({
-                            'tool': 'nikto',
-                            'type': 'Web Vulnerability',
-                            'severity': 'MEDIUM',
-                            'host': self.target,
-                            'description': line.strip(),
-                            'recommendation': 'Review and address identified issue'
-                        })
-            except Exception as e:
-                print(f"[!] Error parsing Nikto results: {e}")
+        parser = NiktoParser(self.target)
+        json_report = f"{self.output_dir}/nikto_scan.json"
+        with self._stage('parse.nikto'):
+            parsed = os.path.exists(json_report) and parser.parse_file(json_report)
+        if parsed:
+            vulnerabilities.extend(parser.vulnerabilities)
+        else:
+            vulnerabilities.extend(fallback.vulnerabilities)
                 
         return vulnerabilities
         
@@ -200,15 +3102,16 @@ class VulnerabilityScanner:
         
         testssl_cmd = [
             'testssl', '--json-pretty',
-            '--file', f"{self.output_dir}/testssl_scan.json",
-            self.target
-        ]
+            '--file', f"{self.output_dir}/testssl_scan.json"
+        ] + self.profile.args('testssl') + [self.target]
         
-        returncode, stdout, stderr = self.run_command(testssl_cmd, timeout=600)
+        returncode, stdout, stderr = self.run_command(
+            testssl_cmd, timeout=self.tool_timeout('testssl'), log_name='testssl'
+        )
         
         if returncode == 0:
             try:
-                with open(f"{self.output_dir}/testssl_scan.json", 'r') as f:
+                with open(f"{self.output_dir}/testssl_scan.json", 'r') as f, self._stage('parse.testssl'):
                     results = json.load(f)
                     
                 # Check for SSL/TLS vulnerabilities
@@ -229,12 +3132,17 @@ class VulnerabilityScanner:
                             'severity': severity,
                             'host': self.target,
                             'vulnerability': name,
+                            'cve': results[check].get('cve', ''),
                             'description': f"Server is vulnerable to {name} attack",
                             'recommendation': f"Patch SSL/TLS implementation to fix {name}"
                         })
                         
             except Exception as e:
                 print(f"[!] Error parsing TestSSL results: {e}")
+                self._tool_state.incomplete = True
+        else:
+            print(f"[!] TestSSL exited with code {returncode}: {stderr.strip()[:200]}")
+            self._tool_state.incomplete = True
                 
         return vulnerabilities
         
@@ -243,74 +3151,133 @@ class VulnerabilityScanner:
         print("[*] Running Nuclei scan...")
         vulnerabilities = []
         
-        # Update templates first
-        update_cmd = ['nuclei', '-update-templates']
-        self.run_command(update_cmd, timeout=120)
+        # Update templates first, unless they are fresh or we are offline. A
+        # failed or timed-out update does not make the scan itself incomplete.
+        incomplete = getattr(self._tool_state, 'incomplete', False)
+        self.nuclei_templates.ensure_fresh(self.run_command)
+        self._tool_state.incomplete = incomplete
         
         nuclei_cmd = [
             'nuclei', '-target', self.target,
             '-json', '-output', f"{self.output_dir}/nuclei_scan.json"
         ]
-        
-        if self.scan_type == 'quick':
-            nuclei_cmd.extend(['-severity', 'critical,high'])
-        else:
-            nuclei_cmd.extend(['-severity', 'critical,high,medium,low'])
+        if self.nuclei_templates.offline:
+            nuclei_cmd.append('-disable-update-check')
+        rate = self.tool_rate()
+        if rate:
+            nuclei_cmd.extend(['-rate-limit', str(max(1, int(rate)))])
+        nuclei_cmd.extend(self.profile.args('nuclei'))
             
-        returncode, stdout, stderr = self.run_command(nuclei_cmd, timeout=1200)
-        
-        if os.path.exists(f"{self.output_dir}/nuclei_scan.json"):
+        # JSON lines are also written to stdout; parse each one as it arrives
+        def parse_line(line: str):
+            line = line.strip()
+            if not line.startswith('{'):
+                return
             try:
-                with open(f"{self.output_dir}/nuclei_scan.json", 'r') as f:
-                    for line in f:
-                        try:
-                            finding = json.loads(line)
-                            vulnerabilities.append({
-                                'tool': 'nuclei',
-                                'type': finding.get('type', 'Unknown'),
-                                'severity': finding.get('severity', 'MEDIUM').upper(),
-                                'host': finding.get('host', self.target),
-                                'template': finding.get('template-id', ''),
-                                'name': finding.get('name', ''),
-                                'description': finding.get('description', ''),
-                                'recommendation': finding.get('remediation', 'Review and patch')
-                            })
-                        except:
-                            continue
-            except Exception as e:
-                print(f"[!] Error parsing Nuclei results: {e}")
-                
+                with self._stage('parse.nuclei'):
+                    vuln = self._nuclei_finding(json.loads(line))
+            except ValueError:
+                return
+            vulnerabilities.append(vuln)
+            self.emit_finding(vuln)
+            # Into the store right away; the later aggregate of the returned
+            # list skips these by fingerprint
+            self.aggregate_results([vuln])
+            
+        returncode, stdout, stderr = self.run_command(
+            nuclei_cmd, timeout=self.tool_timeout('nuclei'), on_stdout=parse_line, log_name='nuclei'
+        )
+        if returncode != 0:
+            print(f"[!] Nuclei exited with code {returncode}: {stderr.strip()[:200]}")
+            self._tool_state.incomplete = True
+        
         return vulnerabilities
         
+    def _nuclei_finding(self, finding: Dict) -> Dict:
+        """Map a nuclei JSON result to a finding"""
+        # Newer nuclei versions nest template metadata under 'info'
+        info = finding.get('info') or {}
+        classification = info.get('classification') or {}
+        vuln = {
+            'tool': 'nuclei',
+            'type': finding.get('type', 'Unknown'),
+            'severity': (info.get('severity') or finding.get('severity') or 'MEDIUM').upper(),
+            'host': finding.get('host', self.target),
+            'template': finding.get('template-id', ''),
+            'name': info.get('name') or finding.get('name', ''),
+            'description': info.get('description') or finding.get('description', ''),
+            'recommendation': info.get('remediation') or finding.get('remediation', 'Review and patch')
+        }
+        if classification.get('cve-id'):
+            vuln['cve'] = classification['cve-id']
+        if classification.get('cwe-id'):
+            vuln['cwe'] = classification['cwe-id']
+            
+        # Header templates report one result per header under the matcher name
+        matcher = finding.get('matcher-name')
+        if matcher and 'header' in vuln['template']:
+            vuln['header'] = matcher
+        return vuln
+        
+    def _classify_path(self, path: str, tool: str) -> Optional[Dict]:
+        """Turn a discovered path into a finding if it looks sensitive"""
+        rule = self.path_classifier.classify(path)
+        if rule is None:
+            return None
+        return {
+            'tool': tool,
+            'type': 'Information Disclosure',
+            'severity': rule['severity'],
+            'host': self.target,
+            'path': path,
+            'description': f"{rule['description']} found at {path}",
+            'recommendation': f"Remove or restrict access to {path}"
+        }
+        
+    def _fuzz_wordlist(self) -> Optional[str]:
+        """System wordlist if installed, else the configured one"""
+        if self.fuzz_wordlist:
+            return self.fuzz_wordlist
+        return DEFAULT_WORDLIST if os.path.exists(DEFAULT_WORDLIST) else None
+        
     def directory_fuzzing(self) -> List[Dict]:
         """Perform directory and file discovery"""
         print("[*] Running directory fuzzing...")
         vulnerabilities = []
         
         # Common wordlist for quick scan
-        wordlist = "/usr/share/wordlists/dirb/common.txt"
-        if not os.path.exists(wordlist):
-            wordlist = "common.txt"
-            # Create basic wordlist if system wordlist not found
+        wordlist = self._fuzz_wordlist()
+        if not wordlist:
+            # Write the basic wordlist next to the results, not into the CWD
+            wordlist = f"{self.output_dir}/common.txt"
             with open(wordlist, 'w') as f:
-                f.write('\n'.join([
-                    'admin', 'administrator', 'backup', 'config', 'dashboard',
-                    'debug', 'test', 'temp', 'tmp', 'upload', 'uploads',
-                    '.git', '.env', '.config', 'wp-admin', 'phpmyadmin'
-                ]))
+                f.write('\n'.join(FALLBACK_WORDS))
                 
         gobuster_cmd = [
             'gobuster', 'dir',
             '-u', self.target,
             '-w', wordlist,
             '-o', f"{self.output_dir}/gobuster_scan.txt",
-            '-x', 'php,asp,aspx,jsp,html,js,txt,xml,json',
-            '-t', '50' if self.scan_type == 'full' else '10'
+            '-x', ','.join(FUZZ_EXTENSIONS)
         ]
+        gobuster_cmd.extend(self.profile.args('gobuster'))
+        threads = self.profile.tool_concurrency('gobuster', 10)
+        rate = self.tool_rate()
+        if rate:
+            # gobuster has no rate option; each thread waits between requests
+            threads = max(1, min(threads, int(rate)))
+            gobuster_cmd.extend(['--delay', f"{int(1000 * threads / rate)}ms"])
+        gobuster_cmd.extend(['-t', str(threads)])
         
-        returncode, stdout, stderr = self.run_command(gobuster_cmd, timeout=600)
+        returncode, stdout, stderr = self.run_command(
+            gobuster_cmd, timeout=self.tool_timeout('gobuster'), log_name='gobuster'
+        )
         
-        if returncode == 0 and os.path.exists(f"{self.output_dir}/gobuster_scan.txt"):
+        if returncode != 0:
+            # Failed runs are not checkpointed or cached, so they rerun
+            print(f"[!] Gobuster exited with code {returncode}: {stderr.strip()[:200]}")
+            self._tool_state.incomplete = True
+        elif os.path.exists(f"{self.output_dir}/gobuster_scan.txt"):
             try:
                 with open(f"{self.output_dir}/gobuster_scan.txt", 'r') as f:
                     for line in f:
@@ -318,41 +3285,64 @@ class VulnerabilityScanner:
                             path = line.split()[0]
                             
                             # Check for sensitive files/directories
-                            sensitive_patterns = [
-                                ('.git', 'Git Repository Exposed', 'CRITICAL'),
-                                ('.env', 'Environment File Exposed', 'CRITICAL'),
-                                ('backup', 'Backup Files/Directory', 'HIGH'),
-                                ('admin', 'Admin Interface Exposed', 'HIGH'),
-                                ('config', 'Configuration Files', 'HIGH'),
-                                ('debug', 'Debug Information', 'MEDIUM'),
-                                ('test', 'Test Files/Directory', 'LOW')
-                            ]
-                            
-                            for pattern, desc, severity in sensitive_patterns:
-                                if pattern in path.lower():
-                                    vulnerabilities.append({
-                                        'tool': 'gobuster',
-                                        'type': 'Information Disclosure',
-                                        'severity': severity,
-                                        'host': self.target,
-                                        'path': path,
-                                        'description': f"{desc} found at {path}",
-                                        'recommendation': f"Remove or restrict access to {path}"
-                                    })
-                                    break
+                            vuln = self._classify_path(path, 'gobuster')
+                            if vuln:
+                                vulnerabilities.append(vuln)
                                     
             except Exception as e:
                 print(f"[!] Error parsing Gobuster results: {e}")
+                self._tool_state.incomplete = True
+                
+        return vulnerabilities
+        
+    def native_directory_fuzzing(self) -> List[Dict]:
+        """Directory and file discovery with the built-in fuzzer (no gobuster needed)"""
+        print("[*] Running directory fuzzing (built-in)...")
+        vulnerabilities = []
+        
+        fuzzer = DirectoryFuzzer(
+            self.target,
+            wordlist=self._fuzz_wordlist(),
+            extensions=FUZZ_EXTENSIONS,
+            concurrency=self.fuzz_concurrency or self.profile.tool_concurrency('dirfuzz', 10),
+            rate=self.fuzz_rate,
+            host_limiter=self.rate_budgets.limiter(self.target) if self.rate_budgets else None
+        )
+        
+        with open(f"{self.output_dir}/dirfuzz_scan.txt", 'w') as out:
+            def on_hit(path: str, status: int, size: int):
+                out.write(f"{path} (Status: {status}) [Size: {size}]\n")
+                if status in (200, 403):
+                    vuln = self._classify_path(path, 'dirfuzz')
+                    if vuln:
+                        vulnerabilities.append(vuln)
+                        
+            if not fuzzer.run(on_hit, timeout=self.tool_timeout('dirfuzz')):
+                self._tool_state.incomplete = True
                 
+        print(f"[*] Directory fuzzing: {fuzzer.requests_sent} requests, {fuzzer.errors} errors, "
+              f"final rate {fuzzer.limiter.rate:.1f}/s")
         return vulnerabilities
         
+    def base_response(self) -> requests.Response:
+        """Fetch the target page once and share it between checks"""
+        with self._base_lock:
+            if self._base_response is None and self._base_error is None:
+                try:
+                    self._base_response = self.http.get(self.target)
+                except Exception as e:
+                    self._base_error = e
+            if self._base_error is not None:
+                raise self._base_error
+            return self._base_response
+            
     def check_headers(self) -> List[Dict]:
         """Check for missing security headers"""
         print("[*] Checking security headers...")
         vulnerabilities = []
         
         try:
-            response = requests.get(self.target, timeout=10, verify=False)
+            response = self.base_response()
             headers = response.headers
             
             # Required security headers
@@ -394,104 +3384,207 @@ class VulnerabilityScanner:
                     
         except Exception as e:
             print(f"[!] Error checking headers: {e}")
+            self._tool_state.incomplete = True
+            
+        return vulnerabilities
+        
+    def discover_injection_points(self, response: requests.Response) -> List[Dict]:
+        """Find (url, method, parameter) combinations from forms and links on a page"""
+        parser = InjectionPointParser(response.url or self.target)
+        try:
+            parser.feed(response.text)
+            parser.close()
+        except Exception as e:
+            print(f"[!] Error parsing page for parameters: {e}")
+            
+        # Each point is one parameter; the form's other fields keep their defaults
+        points, seen = [], set()
+        for form in parser.points:
+            for name in form['fields']:
+                key = (form['url'], form['method'], name)
+                if key not in seen:
+                    seen.add(key)
+                    points.append({
+                        'url': form['url'],
+                        'method': form['method'],
+                        'parameter': name,
+                        'fields': form['fields']
+                    })
+                    
+        # Fall back to the classic ?id= probe on pages with forms we could not read
+        if not points and '<form' in response.text.lower():
+            points.append({'url': self.target, 'method': 'GET', 'parameter': 'id', 'fields': {'id': '1'}})
             
-        return vulnerabilities
+        return points[:self.sqli_max_points]
+        
+    def _probe_injection(self, point: Dict, payload_index: int, baseline: set) -> Optional[str]:
+        """Send one payload to one parameter; returns a newly matched error signature"""
+        payload = SQL_TEST_PAYLOADS[payload_index]
+        fields = dict(point['fields'])
+        fields[point['parameter']] = payload
+        self.sqli_limiter.acquire()
+        if point['method'] == 'POST':
+            response = self.http.request('POST', point['url'], data=fields, timeout=5)
+        else:
+            response = self.http.request('GET', point['url'], params=fields, timeout=5)
+        for match in SQL_ERROR_PATTERN.finditer(response.text):
+            if match.group(0).lower() not in baseline:
+                return match.group(0)
+        return None
         
     def sql_injection_scan(self) -> List[Dict]:
-        """Basic SQL injection detection"""
+        """Probe discovered parameters with the full SQL injection payload set"""
         print("[*] Checking for SQL injection vulnerabilities...")
         vulnerabilities = []
         
-        # This is a basic check - real scanning would use sqlmap
-        test_payloads = [
-            "'", '"', "' OR '1'='1", '" OR "1"="1',
-            "' OR '1'='1' --", "' OR '1'='1' #",
-            "1' ORDER BY 1--", "1' UNION SELECT NULL--"
-        ]
-        
+        # This is an error-based check - deeper scanning would use sqlmap
         try:
-            # Get forms from the target page
-            response = requests.get(self.target, timeout=10, verify=False)
+            # Get forms and links from the target page
+            response = self.base_response()
+            points = self.discover_injection_points(response)
+            if not points:
+                return vulnerabilities
+                
+            # Signatures already on the unmodified page are not evidence
+            baseline = {m.group(0).lower() for m in SQL_ERROR_PATTERN.finditer(response.text)}
             
-            # Simple form detection (real implementation would parse HTML properly)
-            if '<form' in response.text.lower():
-                for payload in test_payloads[:3]:  # Limited testing
-                    test_url = f"{self.target}?id={payload}"
+            print(f"[*] SQL injection: {len(points)} parameters x {len(SQL_TEST_PAYLOADS)} payloads")
+            hits = {}
+            with ThreadPoolExecutor(max_workers=self.sqli_concurrency) as executor:
+                futures = {
+                    executor.submit(self._probe_injection, point, i, baseline): (p, i)
+                    for p, point in enumerate(points)
+                    for i in range(len(SQL_TEST_PAYLOADS))
+                }
+                for future in as_completed(futures):
+                    p, i = futures[future]
                     try:
-                        test_response = requests.get(test_url, timeout=5, verify=False)
-                        
-                        # Check for SQL error messages
-                        sql_errors = [
-                            'mysql_fetch', 'Warning: mysql', 'MySqlException',
-                            'valid MySQL result', 'mssql_query()', 'MySqlClient',
-                            'PostgreSQL', 'valid PostgreSQL result',
-                            'Warning: pg_', 'PG::SyntaxError',
-                            'SQLite error', 'sqlite3.OperationalError',
-                            'Microsoft OLE DB Provider for ODBC Drivers',
-                            'Microsoft OLE DB Provider for SQL Server',
-                            'Incorrect syntax near', 'Sintaxis incorrecta cerca de'
-                        ]
-                        
-                        for error in sql_errors:
-                            if error.lower() in test_response.text.lower():
-                                vulnerabilities.append({
-                                    'tool': 'sql_check',
-                                    'type': 'SQL Injection',
-                                    'severity': 'CRITICAL',
-                                    'host': self.target,
-                                    'parameter': 'id',
-                                    'payload': payload,
-                                    'description': f"Possible SQL injection vulnerability detected",
-                                    'recommendation': 'Use parameterized queries and input validation'
-                                })
-                                break
-                                
-                    except:
+                        evidence = future.result()
+                    except Exception:
+                        # A probe that never got an answer leaves the check partial
+                        self._tool_state.incomplete = True
                         continue
+                    # Keep the first payload in list order so results are stable
+                    if evidence and (p not in hits or i < hits[p][0]):
+                        hits[p] = (i, evidence)
                         
+            for p, (i, evidence) in sorted(hits.items()):
+                point = points[p]
+                vulnerabilities.append({
+                    'tool': 'sql_check',
+                    'type': 'SQL Injection',
+                    'severity': 'CRITICAL',
+                    'host': self.target,
+                    'url': point['url'],
+                    'method': point['method'],
+                    'parameter': point['parameter'],
+                    'payload': SQL_TEST_PAYLOADS[i],
+                    'evidence': evidence,
+                    'description': f"Possible SQL injection in {point['method']} parameter '{point['parameter']}' at {point['url']}",
+                    'recommendation': 'Use parameterized queries and input validation'
+                })
+                
         except Exception as e:
             print(f"[!] Error in SQL injection scan: {e}")
+            self._tool_state.incomplete = True
             
         return vulnerabilities
         
-    def aggregate_results(self, all_vulnerabilities: List[Dict]):
-        """Aggregate and deduplicate vulnerability findings"""
-        # Simple deduplication based on type and host
-        seen = set()
-        unique_vulns = []
-        
-        for vuln in all_vulnerabilities:
-            key = (vuln.get('type'), vuln.get('host'), vuln.get('description', '')[:50])
-            if key not in seen:
-                seen.add(key)
-                unique_vulns.append(vuln)
-                
-                # Update summary
-                severity = vuln.get('severity', 'INFO').lower()
-                if severity in self.results['summary']:
-                    self.results['summary'][severity] += 1
-                    
-        self.results['vulnerabilities'] = unique_vulns
-        
+    def aggregate_results(self, vulnerabilities: List[Dict]):
+        """Add one check's findings to the store, deduplicating and correlating them"""
+        with self._findings_lock:
+            if not self._target_aliased:
+                self._alias_target_addresses()
+            with self._stage('aggregate'):
+                for vuln in vulnerabilities:
+                    self.findings.add_dict(vuln)
+                # Correlation can raise a stored finding's severity, so recount
+                self.results['summary'] = self.findings.counts()
+                
+    def _alias_target_addresses(self):
+        """Map the target host's addresses to its name so nmap findings correlate with URL ones"""
+        self._target_aliased = True
+        if not self.findings.correlate:
+            return
+        name = host_key(self.target)
+        try:
+            ipaddress.ip_network(name, strict=False)
+            return
+        except ValueError:
+            pass
+        try:
+            addresses = {info[4][0] for info in socket.getaddrinfo(name, None)}
+        except (OSError, UnicodeError):
+            return
+        for address in addresses:
+            self.findings.alias_host(address, name)
+            
     def generate_report(self):
         """Generate comprehensive vulnerability report"""
-        # JSON report
+        # JSON report; findings are written one at a time so the full list
+        # of dicts never exists in memory
         json_report = f"{self.output_dir}/vulnerability_report.json"
-        with open(json_report, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        with open(json_report, 'w') as f, self._stage('report.json'):
+            header = json.dumps(self.results, indent=2)
+            f.write(header[:-2])
+            f.write(',\n  "vulnerabilities": [')
+            for i, finding in enumerate(self.findings.sorted_by_severity()):
+                f.write(',\n    ' if i else '\n    ')
+                f.write(json.dumps(finding.to_dict()))
+            f.write('\n  ]\n}\n' if self.findings else ']\n}\n')
             
         # HTML report
         html_report = f"{self.output_dir}/vulnerability_report.html"
-        self._generate_html_report(html_report)
+        with self._stage('report.html'):
+            self._generate_html_report(html_report)
         
         # Text summary
         text_report = f"{self.output_dir}/vulnerability_summary.txt"
-        self._generate_text_summary(text_report)
+        with self._stage('report.text'):
+            self._generate_text_summary(text_report)
         
         print(f"\n[+] Reports generated in {self.output_dir}/")
         
+    def generate_diff_report(self) -> Optional[Dict]:
+        """Write only the changes against the baseline instead of full reports"""
+        baseline = self.baseline.load()
+        if baseline is None:
+            print(f"[!] No baseline for {self.target}; writing full reports instead")
+            self.generate_report()
+            return None
+            
+        diff = self.baseline.diff(baseline, self.findings)
+        diff_report = {
+            'target': self.results['target'],
+            'scan_type': self.results['scan_type'],
+            'timestamp': self.results['timestamp'],
+            **diff
+        }
+        with open(f"{self.output_dir}/vulnerability_diff.json", 'w') as f:
+            json.dump(diff_report, f, indent=2)
+            
+        counts = diff['counts']
+        with open(f"{self.output_dir}/vulnerability_diff.txt", 'w') as f:
+            f.write(f"Target: {self.results['target']}\n")
+            f.write(f"New: {counts['new']}  Resolved: {counts['resolved']}  Unchanged: {counts['unchanged']}\n\n")
+            for label, findings in (('NEW', diff['new']), ('RESOLVED', diff['resolved'])):
+                for vuln in findings:
+                    f.write(f"[{label}] [{vuln.get('severity', 'INFO')}] {vuln.get('type', 'Unknown')} - "
+                            f"{vuln.get('host', 'N/A')}: {vuln.get('description', 'N/A')}\n")
+                            
+        print(f"\n[+] Diff vs baseline: {counts['new']} new, {counts['resolved']} resolved, "
+              f"{counts['unchanged']} unchanged ({self.output_dir}/vulnerability_diff.json)")
+        return diff_report
+        
+    # Findings per collapsible page in the HTML report
+    HTML_PAGE_SIZE = 500
+    
     def _generate_html_report(self, filename: str):
-        """Generate HTML vulnerability report"""
+        """
+        Generate HTML vulnerability report. Findings are written to the file
+        one at a time, in a collapsible section per severity split into pages,
+        so neither this process nor the browser has to hold them all at once.
+        """
         severity_colors = {
             'CRITICAL': '#d32f2f',
             'HIGH': '#f44336',
@@ -570,12 +3663,27 @@ class VulnerabilityScanner:
         th {{
             background-color: #f0f0f0;
         }}
+        details {{
+            margin: 10px 0;
+        }}
+        details > summary {{
+            cursor: pointer;
+            font-weight: bold;
+            padding: 8px 0;
+        }}
+        details details {{
+            margin-left: 20px;
+        }}
+        .vulnerability {{
+            content-visibility: auto;
+            contain-intrinsic-size: auto 150px;
+        }}
     </style>
 </head>
 <body>
     <div class="container">
         <h1>Vulnerability Scan Report</h1>
-        <p><strong>Target:</strong> {self.results['target']}</p>
+        <p><strong>Target:</strong> {escape(str(self.results['target']))}</p>
         <p><strong>Scan Type:</strong> {self.results['scan_type']}</p>
         <p><strong>Date:</strong> {self.results['timestamp']}</p>
         
@@ -606,41 +3714,62 @@ class VulnerabilityScanner:
         <h2>Vulnerability Details</h2>
 """
         
-        # Sort vulnerabilities by severity
-        severity_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3, 'INFO': 4}
-        sorted_vulns = sorted(
-            self.results['vulnerabilities'],
-            key=lambda x: severity_order.get(x.get('severity', 'INFO'), 5)
-        )
+        counts = self.findings.counts()
         
-        for vuln in sorted_vulns:
-            severity = vuln.get('severity', 'INFO')
-            severity_lower = severity.lower()
+        with open(filename, 'w') as f:
+            f.write(html)
             
-            html += f"""
+            current = None
+            position = 0
+            for vuln in self.findings.sorted_by_severity():
+                severity = vuln.severity
+                severity_lower = severity.lower()
+                
+                # Open a new severity section and/or page as the ordering crosses them
+                if severity != current:
+                    if current is not None:
+                        f.write("            </details>\n        </details>\n")
+                    current = severity
+                    position = 0
+                    expanded = ' open' if severity in ('CRITICAL', 'HIGH') else ''
+                    f.write(f'        <details class="severity-section"{expanded}>\n'
+                            f'            <summary>{severity.title()} ({counts[severity_lower]})</summary>\n')
+                if position % self.HTML_PAGE_SIZE == 0:
+                    if position:
+                        f.write("            </details>\n")
+                    last = min(position + self.HTML_PAGE_SIZE, counts[severity_lower])
+                    expanded = ' open' if position == 0 else ''
+                    f.write(f'            <details{expanded}>\n'
+                            f'            <summary>{position + 1}-{last}</summary>\n')
+                position += 1
+                
+                f.write(f"""
         <div class="vulnerability {severity_lower}">
             <span class="severity-badge {severity_lower}">{severity}</span>
-            <strong>{vuln.get('type', 'Unknown')}</strong> - {vuln.get('tool', 'Unknown Tool')}
-            <p><strong>Host:</strong> {vuln.get('host', 'N/A')}</p>
-            <p><strong>Description:</strong> {vuln.get('description', 'No description available')}</p>
-            <p><strong>Recommendation:</strong> {vuln.get('recommendation', 'No recommendation available')}</p>
-"""
-            
-            # Add additional details if available
-            for key in ['port', 'service', 'path', 'header', 'parameter']:
-                if key in vuln:
-                    html += f"            <p><strong>{key.title()}:</strong> {vuln[key]}</p>\n"
+            <strong>{escape(str(vuln.get('type', 'Unknown')))}</strong> - {escape(str(vuln.get('tool', 'Unknown Tool')))}
+            <p><strong>Host:</strong> {escape(str(vuln.get('host', 'N/A')))}</p>
+            <p><strong>Description:</strong> {escape(str(vuln.get('description', 'No description available')))}</p>
+            <p><strong>Recommendation:</strong> {escape(str(vuln.get('recommendation', 'No recommendation available')))}</p>
+""")
+                
+                # Add additional details if available
+                for key in ['port', 'service', 'path', 'header', 'parameter']:
+                    if key in vuln:
+                        f.write(f"            <p><strong>{key.title()}:</strong> {escape(str(vuln[key]))}</p>\n")
+                if vuln.sources:
+                    tools = ', '.join(sorted({source['tool'] for source in vuln.sources}))
+                    f.write(f"            <p><strong>Reported by:</strong> {escape(tools)}</p>\n")
                     
-            html += "        </div>\n"
-            
-        html += """
+                f.write("        </div>\n")
+                
+            if current is not None:
+                f.write("            </details>\n        </details>\n")
+                
+            f.write("""
     </div>
 </body>
 </html>
-"""
-        
-        with open(filename, 'w') as f:
-            f.write(html)
+""")
             
     def _generate_text_summary(self, filename: str):
         """Generate text summary of findings"""
@@ -662,20 +3791,260 @@ class VulnerabilityScanner:
             f.write("=" * 80 + "\n\n")
             
             # Show top 10 most severe vulnerabilities
-            severity_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3, 'INFO': 4}
-            sorted_vulns = sorted(
-                self.results['vulnerabilities'],
-                key=lambda x: severity_order.get(x.get('severity', 'INFO'), 5)
-            )[:10]
+            top_vulns = islice(self.findings.sorted_by_severity(), 10)
             
-            for i, vuln in enumerate(sorted_vulns, 1):
+            for i, vuln in enumerate(top_vulns, 1):
                 f.write(f"{i}. [{vuln.get('severity', 'INFO')}] {vuln.get('type', 'Unknown')}\n")
                 f.write(f"   Host: {vuln.get('host', 'N/A')}\n")
+                if vuln.sources:
+                    f.write(f"   Reported by: {', '.join(sorted({source['tool'] for source in vuln.sources}))}\n")
                 f.write(f"   Description: {vuln.get('description', 'N/A')}\n")
                 f.write(f"   Recommendation: {vuln.get('recommendation', 'N/A')}\n\n")
                 
-    def run_scan(self):
-        """Execute full vulnerability scan"""
+    def tool_rate(self) -> Optional[float]:
+        """
+        Requests per second an external tool may send to the target: an
+        equal share of the host budget between the checks that may run at
+        once, at its current adapted rate. None when there is no budget.
+        """
+        if self.rate_budgets is None:
+            return None
+        return self.rate_budgets.tool_rate(self.target, self.max_concurrent_checks)
+        
+    def tool_timeout(self, tool: str) -> int:
+        """
+        Timeout for a tool: from its runtime history if there is enough,
+        else the profile's; never longer than the time budget
+        """
+        timeout = self.profile.timeout(tool)
+        if self.runtime_history is not None:
+            timeout = self.runtime_history.timeout(self.target, self.scan_type, tool, timeout)
+        if self.time_budget:
+            timeout = min(timeout, int(self.time_budget))
+        return timeout
+        
+    def expected_duration(self, tool: str) -> float:
+        """How long a check is expected to take: median past runtime, else the profile's cost"""
+        if self.runtime_history is None or not self.runtime_history.durations(self.target, self.scan_type, tool):
+            return self.profile.cost(tool)
+        return self.runtime_history.expected(self.target, self.scan_type, tool)
+        
+    def plan_checks(self, available_tools: Dict[str, bool],
+                    within_budget: bool = True) -> List[Tuple[str, Callable]]:
+        """Select the checks the profile runs against this target, given available tools"""
+        checks = self._candidate_checks(available_tools)
+        checks = [(tool, check) for tool, check in checks if self.profile.includes(tool)]
+        if not (within_budget and self.time_budget):
+            return checks
+            
+        selected = self.profile.select(
+            [tool for tool, check in checks], self.time_budget,
+            self.max_concurrent_checks, self.expected_duration
+        )
+        skipped = [tool for tool, check in checks if tool not in selected]
+        if skipped:
+            print(f"[*] Time budget {self.time_budget:.0f}s: skipping {', '.join(skipped)}")
+        return [(tool, check) for tool, check in checks if tool in selected]
+        
+    def _candidate_checks(self, available_tools: Dict[str, bool]) -> List[Tuple[str, Callable]]:
+        """Checks that could run against this target with the available tools"""
+        # In-process checks need no tools
+        checks = [
+            ('header_check', self.check_headers),
+            ('sql_check', self.sql_injection_scan)
+        ]
+        
+        # Tool-specific scans
+        if available_tools.get('nmap'):
+            checks.append(('nmap', self.nmap_scan))
+            
+        if available_tools.get('nikto') and self.target.startswith('http'):
+            checks.append(('nikto', self.nikto_scan))
+            
+        if available_tools.get('testssl') and self.target.startswith('https'):
+            checks.append(('testssl', self.testssl_scan))
+            
+        if available_tools.get('nuclei'):
+            checks.append(('nuclei', self.nuclei_scan))
+            
+        if self.target.startswith('http'):
+            use_gobuster = self.fuzzer == 'gobuster' or (self.fuzzer == 'auto' and available_tools.get('gobuster'))
+            if use_gobuster and available_tools.get('gobuster') and self.profile.includes('gobuster'):
+                checks.append(('gobuster', self.directory_fuzzing))
+            elif self.fuzzer in ('auto', 'native'):
+                checks.append(('dirfuzz', self.native_directory_fuzzing))
+            
+        return checks
+        
+    def run_check(self, tool: str, check: Callable) -> List[Dict]:
+        """Run a single check once a target slot and a tool slot are free"""
+        self._record_check(tool, 'waiting')
+        findings = self.checkpoint.completed(tool)
+        if findings is not None:
+            print(f"[*] Skipping {tool} (completed in previous run, {len(findings)} findings)")
+            self._record_check(tool, 'resumed', findings)
+            return findings
+            
+        cache_key = self._result_cache_key(tool)
+        if cache_key:
+            findings = self.result_cache.get(cache_key)
+            if findings is not None:
+                print(f"[*] Using cached {tool} results ({len(findings)} findings)")
+                self.checkpoint.record(tool, findings)
+                self._record_check(tool, 'cached', findings)
+                return findings
+                
+        if self.abort_event.is_set():
+            self._tool_state.incomplete = True
+            self._record_check(tool, 'cancelled')
+            return []
+            
+        tool_slot = self.tool_slots.get(tool)
+        with self.target_slots:
+            if tool_slot is None:
+                findings = self._run_and_checkpoint(tool, check)
+            else:
+                with tool_slot:
+                    findings = self._run_and_checkpoint(tool, check)
+                    
+        if cache_key and not self._tool_state.incomplete:
+            self.result_cache.put(cache_key, findings, target=self.target, tool=tool)
+        return findings
+        
+    def target_fingerprint(self) -> Optional[str]:
+        """
+        Cheap fingerprint of the deployed target: an explicit build id, or
+        identifying response headers plus the TLS certificate hash.
+        Returns None if the target cannot be reached.
+        """
+        with self._fingerprint_lock:
+            if self._target_fingerprint is None:
+                self._target_fingerprint = self._compute_fingerprint() or ''
+            return self._target_fingerprint or None
+            
+    def _compute_fingerprint(self) -> Optional[str]:
+        if self.build_id:
+            return f"build:{self.build_id}"
+            
+        parts = {}
+        if self.target.startswith('http'):
+            try:
+                response = self.base_response()
+            except Exception as e:
+                print(f"[!] Could not fingerprint target, result cache disabled: {e}")
+                return None
+            names = ['Server', 'X-Powered-By', 'ETag', 'Last-Modified']
+            if self.fingerprint_header:
+                names.append(self.fingerprint_header)
+            parts['headers'] = {name: response.headers.get(name) for name in names}
+            parts['status'] = response.status_code
+            
+        if self.target.startswith('https'):
+            parsed = urlparse(self.target)
+            try:
+                pem = ssl.get_server_certificate((parsed.hostname, parsed.port or 443), timeout=10)
+                parts['cert'] = hashlib.sha256(pem.encode()).hexdigest()
+            except Exception:
+                parts['cert'] = None
+                
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+        
+    def _result_cache_key(self, tool: str) -> Optional[str]:
+        """Result cache key for a tool, or None when caching is off or impossible"""
+        if self.result_cache is None:
+            return None
+        fingerprint = self.target_fingerprint()
+        if fingerprint is None:
+            return None
+        if tool in TOOL_PROBES:
+            if self.tool_cache is None:
+                self.tool_cache = ToolProbeCache(command_runner=self.command_runner)
+            version = self.tool_cache.version(tool)
+        else:
+            # In-process checks change with this script
+            version = script_digest()
+        return ResultCache.key(
+            target=self.target, tool=tool, version=version,
+            scan_type=self.scan_type, profile=self.profile.tools.get(tool),
+            fingerprint=fingerprint
+        )
+                
+    def _run_and_checkpoint(self, tool: str, check: Callable) -> List[Dict]:
+        """Run a check and checkpoint it unless one of its commands was cut short"""
+        if self.abort_event.is_set():
+            self._tool_state.incomplete = True
+            self._record_check(tool, 'cancelled')
+            return []
+            
+        self._tool_state.incomplete = False
+        self._tool_state.tool = tool
+        self._record_check(tool, 'running')
+        started = time.monotonic()
+        try:
+            findings = check()
+        except Exception:
+            self._record_check(tool, 'failed')
+            raise
+        finally:
+            self._tool_state.tool = None
+        elapsed = time.monotonic() - started
+        self.tool_durations[tool] = elapsed
+        # Runs cut short by an abort say nothing about how long the tool takes
+        if self.runtime_history and not self.abort_event.is_set():
+            self.runtime_history.record(
+                self.target, self.scan_type, tool, elapsed, not self._tool_state.incomplete
+            )
+        self._check_fail_fast(findings)
+        if self._tool_state.incomplete:
+            print(f"[!] {tool} did not complete; it will rerun on --resume")
+            self._record_check(tool, 'incomplete', findings)
+        else:
+            self.checkpoint.record(tool, findings)
+            self._record_check(tool, 'completed', findings)
+        return findings
+                
+    def scheduled_checks(self, available_tools: Dict[str, bool]) -> List[Tuple[float, str, Callable]]:
+        """Planned checks with their expected durations, longest first"""
+        self._started = time.monotonic()
+        checks = [
+            (self.expected_duration(tool), tool, check)
+            for tool, check in self.plan_checks(available_tools)
+        ]
+        checks.sort(key=lambda entry: entry[0], reverse=True)
+        for expected, tool, check in checks:
+            self._record_check(tool, 'queued')
+        return checks
+        
+    def submit_checks(self, executor: ThreadPoolExecutor, available_tools: Dict[str, bool]) -> List:
+        """Submit this target's checks to an executor, longest-expected first"""
+        return [
+            executor.submit(self.run_check, tool, check)
+            for expected, tool, check in self.scheduled_checks(available_tools)
+        ]
+        
+    def timing_report(self) -> Optional[Dict]:
+        """
+        Wall time of this scan against its critical path: the longest single
+        check, or all check time spread over the target's worker slots if
+        that is larger. No schedule can finish faster than this bound.
+        """
+        if not self.tool_durations or self._started is None:
+            return None
+        wall = time.monotonic() - self._started
+        longest_tool = max(self.tool_durations, key=self.tool_durations.get)
+        longest = self.tool_durations[longest_tool]
+        slots = min(self.max_concurrent_checks, len(self.tool_durations))
+        bound = max(longest, sum(self.tool_durations.values()) / slots)
+        return {
+            'wall_time': round(wall, 1),
+            'critical_path': {'tool': longest_tool, 'seconds': round(longest, 1)},
+            'lower_bound': round(bound, 1),
+            'efficiency': round(bound / wall, 3) if wall else 1.0,
+            'tools': {tool: round(seconds, 1) for tool, seconds in self.tool_durations.items()}
+        }
+        
+    def print_banner(self):
+        """Print scan banner"""
         print(f"""
 ╔══════════════════════════════════════════╗
 ║     Automated Vulnerability Scanner      ║
@@ -686,52 +4055,35 @@ Scan Type: {self.scan_type}
 Output Directory: {self.output_dir}
 """)
         
-        # Check available tools
-        print("[*] Checking available tools...")
-        available_tools = self.check_tool_availability()
-        print(f"[*] Available tools: {', '.join([t for t, a in available_tools.items() if a])}")
-        
-        all_vulnerabilities = []
-        
-        # Run scans based on available tools
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
+    def finish_scan(self):
+        """Write reports for the aggregated findings and print the summary"""
+        if self.abort_event.is_set():
+            self.results['aborted'] = self.abort_reason or 'Aborted by fail-fast on another target'
+        timing = self.timing_report()
+        if timing:
+            self.results['timing'] = timing
+        if self.diff_mode:
+            with self._stage('report.diff'):
+                self.generate_diff_report()
+        else:
+            self.generate_report()
             
-            # Always run these checks
-            futures.append(executor.submit(self.check_headers))
-            futures.append(executor.submit(self.sql_injection_scan))
+        if self.update_baseline:
+            with self._stage('report.baseline'):
+                self.baseline.save(self.findings)
+            print(f"[+] Baseline updated: {self.baseline.path}")
             
-            # Tool-specific scans
-            if available_tools.get('nmap'):
-                futures.append(executor.submit(self.nmap_scan))
-                
-            if available_tools.get('nikto') and self.target.startswith('http'):
-                futures.append(executor.submit(self.nikto_scan))
-                
-            if available_tools.get('testssl') and self.target.startswith('https'):
-                futures.append(executor.submit(self.testssl_scan))
-                
-            if available_tools.get('nuclei'):
-                futures.append(executor.submit(self.nuclei_scan))
-                
-            if available_tools.get('gobuster') and self.target.startswith('http'):
-                futures.append(executor.submit(self.directory_fuzzing))
+        if self.findings_db:
+            try:
+                with self._stage('report.db'):
+                    self.findings_db.record(self)
+                print(f"[+] Findings recorded in {self.findings_db.path}")
+            except sqlite3.Error as e:
+                print(f"[!] Could not record findings in {self.findings_db.path}: {e}")
                 
-            # Collect results
-            for future in as_completed(futures):
-                try:
-                    result = future.result()
-                    all_vulnerabilities.extend(result)
-                except Exception as e:
-                    print(f"[!] Scan error: {e}")
-                    
-        # Aggregate and generate reports
-        self.aggregate_results(all_vulnerabilities)
-        self.generate_report()
-        
         # Print summary
         print(f"""
-[+] Scan completed!
+[+] Scan completed: {self.target}
 
 Summary:
 - Critical: {self.results['summary']['critical']}
@@ -740,39 +4092,963 @@ Summary:
 - Low: {self.results['summary']['low']}
 - Info: {self.results['summary']['info']}
 
-Total vulnerabilities found: {len(self.results['vulnerabilities'])}
+Total vulnerabilities found: {len(self.findings)}
 Reports saved to: {self.output_dir}/
 """)
+        if timing:
+            critical = timing['critical_path']
+            print(f"[*] Runtime {timing['wall_time']:.0f}s; critical path {critical['tool']} "
+                  f"{critical['seconds']:.0f}s, lower bound {timing['lower_bound']:.0f}s "
+                  f"({timing['efficiency']:.0%} of ideal)")
+        
+    def run_scan(self):
+        """Execute full vulnerability scan"""
+        self.print_banner()
+        
+        # Check available tools
+        print("[*] Checking available tools...")
+        available_tools = self.check_tool_availability(self.required_tools())
+        print(f"[*] Available tools: {', '.join([t for t, a in available_tools.items() if a])}")
+        
+        # Run scans based on available tools
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_checks) as executor:
+            futures = self.submit_checks(executor, available_tools)
+                
+            # Collect results
+            try:
+                for future in as_completed(futures):
+                    try:
+                        self.aggregate_results(future.result())
+                    except Exception as e:
+                        print(f"[!] Scan error: {e}")
+            except KeyboardInterrupt:
+                # Kill running tools so the pool can shut down; completed
+                # tools are already in the checkpoint
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.command_runner.cancel_all()
+                raise
+                    
+        # Generate reports
+        self.finish_scan()
+        
+        if self.abort_event.is_set():
+            raise ScanAborted(self.abort_reason or 'Scan aborted')
+
+class BatchScanner:
+    MANIFEST = 'batch_manifest.json'
+    
+    def __init__(self, targets: List[str], scan_type: str = 'full', output_dir: Optional[str] = None,
+                 max_workers: int = 8, per_target: int = 4,
+                 tool_limits: Optional[Dict[str, int]] = None,
+                 command_runner: Optional[CommandRunner] = None,
+                 tool_cache: Optional[ToolProbeCache] = None,
+                 **scanner_options):
+        self.targets = targets
+        # Extra keyword options passed through to every VulnerabilityScanner;
+        # all targets share one abort event so fail-fast stops the whole batch
+        self.scanner_options = scanner_options
+        self.abort_event = scanner_options.setdefault('abort_event', threading.Event())
+        self.scan_type = scan_type
+        self.max_workers = max_workers
+        self.per_target = per_target
+        self.batch_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.output_dir = output_dir or f"batch_results_{self.batch_id}"
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        limits = dict(DEFAULT_TOOL_LIMITS)
+        limits.update(tool_limits or {})
+        self.tool_slots = {
+            tool: threading.BoundedSemaphore(limit)
+            for tool, limit in limits.items() if limit > 0
+        }
+        self.command_runner = command_runner or CommandRunner()
+        self.tool_cache = tool_cache or ToolProbeCache(command_runner=self.command_runner)
+        
+    def _target_dir(self, index: int, target: str) -> str:
+        """Build a filesystem-safe per-target output directory"""
+        name = re.sub(r'[^A-Za-z0-9._-]+', '_', target.split('://', 1)[-1]).strip('_')
+        return os.path.join(self.output_dir, f"{index:03d}_{name}")
+        
+    def run(self) -> Dict[str, Dict]:
+        """Scan every target on one shared worker pool"""
+        print(f"""
+╔══════════════════════════════════════════╗
+║   Automated Vulnerability Scanner Batch  ║
+╚══════════════════════════════════════════╝
+
+Targets: {len(self.targets)}
+Scan Type: {self.scan_type}
+Workers: {self.max_workers} (per target: {self.per_target})
+Output Directory: {self.output_dir}
+""")
+        
+        self._write_batch_manifest()
+        scanners = [
+            VulnerabilityScanner(
+                target, self.scan_type,
+                output_dir=self._target_dir(i, target),
+                tool_slots=self.tool_slots,
+                max_concurrent_checks=self.per_target,
+                command_runner=self.command_runner,
+                tool_cache=self.tool_cache,
+                **self.scanner_options
+            )
+            for i, target in enumerate(self.targets, 1)
+        ]
+        
+        # Tool availability does not depend on the target, so probe it once
+        # for every tool any of the targets would use
+        print("[*] Checking available tools...")
+        needed = sorted({tool for scanner in scanners for tool in scanner.required_tools()})
+        available_tools = self.tool_cache.resolve(needed)
+        print(f"[*] Available tools: {', '.join([t for t, a in available_tools.items() if a])}")
+        
+        owners = {}
+        pending = {}
+        
+        # Start the longest-expected checks first across all targets so the
+        # slowest tool does not begin last and stretch the batch
+        scheduled = []
+        for scanner in scanners:
+            checks = scanner.scheduled_checks(available_tools)
+            pending[scanner] = len(checks)
+            scheduled.extend((expected, scanner, tool, check) for expected, tool, check in checks)
+        scheduled.sort(key=lambda entry: entry[0], reverse=True)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for expected, scanner, tool, check in scheduled:
+                owners[executor.submit(scanner.run_check, tool, check)] = scanner
+                    
+            # Targets with nothing to run still get a report
+            for scanner in scanners:
+                if not pending[scanner]:
+                    scanner.finish_scan()
+                    
+            # Finalize each target as soon as its last check completes
+            try:
+                for future in as_completed(owners):
+                    scanner = owners[future]
+                    try:
+                        scanner.aggregate_results(future.result())
+                    except Exception as e:
+                        print(f"[!] Scan error ({scanner.target}): {e}")
+                        
+                    pending[scanner] -= 1
+                    if pending[scanner] == 0:
+                        scanner.finish_scan()
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self.command_runner.cancel_all()
+                raise
+                    
+        results = {scanner.target: scanner.results for scanner in scanners}
+        self._write_batch_summary(scanners)
+        
+        if self.abort_event.is_set():
+            reasons = [scanner.abort_reason for scanner in scanners if scanner.abort_reason]
+            raise ScanAborted(reasons[0] if reasons else 'Batch aborted')
+        return results
+        
+    def _write_batch_manifest(self):
+        """Record the target list so an interrupted batch can be resumed"""
+        manifest = {
+            'batch_id': self.batch_id,
+            'scan_type': self.scan_type,
+            'targets': self.targets
+        }
+        with open(f"{self.output_dir}/{self.MANIFEST}", 'w') as f:
+            json.dump(manifest, f, indent=2)
+            
+    @classmethod
+    def read_manifest(cls, output_dir: str) -> Optional[Dict]:
+        """Load a batch manifest from a directory, if one exists"""
+        try:
+            with open(os.path.join(output_dir, cls.MANIFEST), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+            
+    def _write_batch_summary(self, scanners: List[VulnerabilityScanner]):
+        """Write an index of per-target summaries and report locations"""
+        summary = {
+            'batch_id': self.batch_id,
+            'scan_type': self.scan_type,
+            'timestamp': datetime.now().isoformat(),
+            'targets': [
+                {
+                    'target': scanner.target,
+                    'output_dir': scanner.output_dir,
+                    'summary': scanner.results['summary'],
+                    'total': len(scanner.findings)
+                }
+                for scanner in scanners
+            ]
+        }
+        with open(f"{self.output_dir}/batch_summary.json", 'w') as f:
+            json.dump(summary, f, indent=2)
+            
+        print(f"[+] Batch completed: {len(scanners)} targets, summary saved to {self.output_dir}/batch_summary.json")
+
+class JobQueue:
+    """
+    Durable queue of (target, tool) jobs shared by a coordinator and any
+    number of worker processes, on this host or on others that mount the
+    same filesystem. Workers lease a job and renew the lease with
+    heartbeats; a job whose lease runs out is handed to the next worker.
+    Uses SQLite's rollback journal rather than WAL, which needs shared
+    memory and does not work across hosts.
+    """
+    
+    MAX_ATTEMPTS = 3
+    FINISHED = ('done', 'failed', 'cancelled')
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY,
+            batch TEXT NOT NULL,
+            target TEXT NOT NULL,
+            tool TEXT NOT NULL,
+            scan_type TEXT NOT NULL,
+            output_dir TEXT NOT NULL,
+            priority REAL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            findings TEXT,
+            incomplete INTEGER,
+            error TEXT,
+            updated REAL,
+            UNIQUE (batch, target, tool)
+        );
+        CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority);
+        CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, status);
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(self.SCHEMA)
+        finally:
+            conn.close()
+            
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; writes that must be atomic use BEGIN IMMEDIATE
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        
+    def _write(self, sql: str, params: Tuple = ()) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+            
+    def _read(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+            
+    def enqueue(self, batch: str, jobs: List[Dict]) -> int:
+        """Add jobs for a batch; jobs already queued for it are kept as they are"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (batch, target, tool, scan_type, output_dir, priority, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (batch, job['target'], job['tool'], job['scan_type'], job['output_dir'],
+                     job.get('priority', 0), time.time())
+                    for job in jobs
+                ]
+            )
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+            return added
+        finally:
+            conn.close()
+            
+    def claim(self, worker: str, lease: float) -> Optional[Dict]:
+        """Lease the highest-priority pending or abandoned job, or None if there is none"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Jobs whose workers keep dying are given up on
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired too many times', updated = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.MAX_ATTEMPTS)
+            )
+            row = conn.execute(
+                "SELECT id, batch, target, tool, scan_type, output_dir, attempts FROM jobs "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker, now + lease, now, row[0])
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        job = dict(zip(('id', 'batch', 'target', 'tool', 'scan_type', 'output_dir', 'attempts'), row))
+        job['attempts'] += 1
+        return job
+        
+    def heartbeat(self, job_id: int, worker: str, lease: float) -> bool:
+        """Extend a lease; False if the job was cancelled or leased to another worker"""
+        return self._write(
+            "UPDATE jobs SET lease_expires = ?, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + lease, time.time(), job_id, worker)
+        ) == 1
+        
+    def complete(self, job_id: int, worker: str, findings: List[Dict], incomplete: bool) -> bool:
+        """Store a job's findings; False if the lease was lost and the result dropped"""
+        return self._write(
+            "UPDATE jobs SET status = 'done', findings = ?, incomplete = ?, lease_expires = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (json.dumps(findings), int(incomplete), time.time(), job_id, worker)
+        ) == 1
+        
+    def fail(self, job_id: int, worker: str, error: str):
+        """Return a failed job to the queue, or give up on it after MAX_ATTEMPTS"""
+        self._write(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, worker = NULL, lease_expires = NULL, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (self.MAX_ATTEMPTS, error, time.time(), job_id, worker)
+        )
+        
+    def release(self, job_id: int, worker: str):
+        """Hand a job back without counting the attempt, e.g. when a worker is stopped"""
+        self._write(
+            "UPDATE jobs SET status = 'pending', attempts = attempts - 1, worker = NULL, "
+            "lease_expires = NULL, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time(), job_id, worker)
+        )
+        
+    def cancel(self, batch: str) -> int:
+        """Cancel a batch's unfinished jobs; workers running one stop at their next heartbeat"""
+        return self._write(
+            "UPDATE jobs SET status = 'cancelled', updated = ? "
+            "WHERE batch = ? AND status IN ('pending', 'leased')",
+            (time.time(), batch)
+        )
+        
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """Jobs per status, for one batch or the whole queue"""
+        if batch is None:
+            rows = self._read("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        else:
+            rows = self._read("SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status", (batch,))
+        return dict(rows)
+        
+    def claimable(self, batch: str) -> int:
+        """Jobs of a batch a worker could lease now: pending or with an expired lease"""
+        rows = self._read(
+            "SELECT COUNT(*) FROM jobs WHERE batch = ? AND (status = 'pending' "
+            "OR (status = 'leased' AND lease_expires < ?))",
+            (batch, time.time())
+        )
+        return rows[0][0]
+        
+    def finished(self, batch: str) -> List[Tuple[int, str, str, str, Optional[str]]]:
+        """(id, target, tool, status, error) of a batch's finished jobs"""
+        return self._read(
+            f"SELECT id, target, tool, status, error FROM jobs WHERE batch = ? "
+            f"AND status IN ({', '.join('?' * len(self.FINISHED))})",
+            (batch,) + self.FINISHED
+        )
+        
+    def findings(self, job_id: int) -> Tuple[List[Dict], bool]:
+        """Findings of a finished job and whether the tool was cut short"""
+        rows = self._read("SELECT findings, incomplete FROM jobs WHERE id = ?", (job_id,))
+        if not rows or rows[0][0] is None:
+            return [], True
+        return json.loads(rows[0][0]), bool(rows[0][1])
+
+class ScanWorker:
+    """
+    Runs jobs from a JobQueue one at a time until the queue stays empty for
+    idle_exit seconds. Each job runs through VulnerabilityScanner.run_check
+    in its own output directory, with a heartbeat thread renewing the lease.
+    """
+    
+    def __init__(self, queue: JobQueue, worker_id: Optional[str] = None,
+                 lease: float = 60, poll_interval: float = 2.0, idle_exit: float = 60,
+                 command_runner: Optional[CommandRunner] = None,
+                 tool_cache: Optional[ToolProbeCache] = None,
+                 profiles: Optional[Dict[str, ScanProfile]] = None,
+                 **scanner_options):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.idle_exit = idle_exit
+        self.command_runner = command_runner or CommandRunner()
+        self.tool_cache = tool_cache or ToolProbeCache(command_runner=self.command_runner)
+        # The coordinator writes reports and history for the whole target
+        scanner_options.pop('findings_db', None)
+        # Each job names its own profile
+        scanner_options.pop('profile', None)
+        self.profiles = profiles or ScanProfile.load()
+        self.scanner_options = scanner_options
+        self.jobs_run = 0
+        
+    def run(self) -> int:
+        """Process jobs until idle; returns how many were run"""
+        print(f"[*] Worker {self.worker_id} polling {self.queue.path}")
+        idle_since = time.monotonic()
+        while True:
+            job = self.queue.claim(self.worker_id, self.lease)
+            if job is None:
+                if self.idle_exit and time.monotonic() - idle_since >= self.idle_exit:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.run_job(job)
+            self.jobs_run += 1
+            idle_since = time.monotonic()
+            
+        print(f"[*] Worker {self.worker_id} idle, exiting after {self.jobs_run} jobs")
+        return self.jobs_run
+        
+    def run_job(self, job: Dict):
+        """Run one leased job and report its findings back to the queue"""
+        tool = job['tool']
+        print(f"[*] {self.worker_id}: {tool} on {job['target']} (attempt {job['attempts']})")
+        profile = self.profiles.get(job['scan_type'])
+        if profile is None:
+            self.queue.fail(job['id'], self.worker_id, f"profile '{job['scan_type']}' unknown on {self.worker_id}")
+            return
+        scanner = VulnerabilityScanner(
+            job['target'], job['scan_type'], profile=profile,
+            output_dir=os.path.join(job['output_dir'], 'jobs', tool),
+            max_concurrent_checks=1,
+            command_runner=self.command_runner,
+            tool_cache=self.tool_cache,
+            **self.scanner_options
+        )
+        available_tools = self.tool_cache.resolve(scanner.required_tools())
+        # The coordinator already applied any time budget when queueing
+        check = dict(scanner.plan_checks(available_tools, within_budget=False)).get(tool)
+        if check is None:
+            self.queue.fail(job['id'], self.worker_id, f"{tool} not available on {self.worker_id}")
+            return
+            
+        stop = threading.Event()
+        
+        def heartbeat():
+            while not stop.wait(self.lease / 3):
+                if not self.queue.heartbeat(job['id'], self.worker_id, self.lease):
+                    print(f"[!] {self.worker_id}: lost lease on {tool} for {job['target']}; stopping it")
+                    scanner.abort_event.set()
+                    self.command_runner.cancel_all()
+                    return
+                    
+        beat = threading.Thread(target=heartbeat, daemon=True)
+        beat.start()
+        try:
+            findings = scanner.run_check(tool, check)
+            incomplete = bool(getattr(scanner._tool_state, 'incomplete', False))
+            if not self.queue.complete(job['id'], self.worker_id, findings, incomplete):
+                print(f"[!] {self.worker_id}: result for {tool} on {job['target']} dropped, lease lost")
+        except KeyboardInterrupt:
+            self.queue.release(job['id'], self.worker_id)
+            self.command_runner.cancel_all()
+            raise
+        except Exception as e:
+            print(f"[!] {self.worker_id}: {tool} on {job['target']} failed: {e}")
+            self.queue.fail(job['id'], self.worker_id, str(e))
+        finally:
+            stop.set()
+            beat.join()
+
+class ScanCoordinator(BatchScanner):
+    """
+    Batch scan whose checks run on ScanWorker processes instead of a local
+    thread pool. Every (target, tool) pair becomes a job in a JobQueue;
+    finished jobs are merged through the normal aggregation and reports.
+    Re-running with the same output directory reattaches to its jobs.
+    """
+    
+    def __init__(self, targets: List[str], queue: JobQueue, scan_type: str = 'full',
+                 output_dir: Optional[str] = None, spawn_workers: int = 0,
+                 worker_args: Optional[List[str]] = None, poll_interval: float = 2.0,
+                 **kwargs):
+        super().__init__(targets, scan_type, output_dir=output_dir, **kwargs)
+        self.queue = queue
+        self.batch = os.path.abspath(self.output_dir)
+        self.spawn_workers = spawn_workers
+        self.worker_args = worker_args or []
+        self.poll_interval = poll_interval
+        self.workers: List[subprocess.Popen] = []
+        self.metrics = self.scanner_options.get('metrics')
+        
+    def _spawn_worker(self, index: int) -> subprocess.Popen:
+        """Start a local worker process on the queue, logging to the batch directory"""
+        log = open(os.path.join(self.output_dir, f"worker_{index:02d}.log"), 'a')
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', self.queue.path] + self.worker_args
+        try:
+            return subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+        finally:
+            log.close()
+            
+    def _keep_workers_alive(self):
+        """
+        Replace local workers that crashed, and ones that went idle if
+        jobs have become claimable again (e.g. a remote worker's lease expired)
+        """
+        claimable = None
+        for i, worker in enumerate(self.workers):
+            if worker.poll() is None:
+                continue
+            if worker.returncode != 0:
+                print(f"[!] Local worker {i} exited with code {worker.returncode}; restarting it")
+            else:
+                if claimable is None:
+                    claimable = self.queue.claimable(self.batch)
+                if not claimable:
+                    continue
+                print(f"[*] Local worker {i} went idle with {claimable} jobs claimable; restarting it")
+            self.workers[i] = self._spawn_worker(i)
+                
+    def run(self) -> Dict[str, Dict]:
+        """Queue every target's checks and collect results as workers finish them"""
+        print(f"""
+╔══════════════════════════════════════════╗
+║ Automated Vulnerability Scan Coordinator ║
+╚══════════════════════════════════════════╝
+
+Targets: {len(self.targets)}
+Scan Type: {self.scan_type}
+Queue: {self.queue.path}
+Output Directory: {self.output_dir}
+""")
+        
+        self._write_batch_manifest()
+        scanners = {}
+        for i, target in enumerate(self.targets, 1):
+            scanners[target] = VulnerabilityScanner(
+                target, self.scan_type,
+                output_dir=self._target_dir(i, target),
+                max_concurrent_checks=self.per_target,
+                command_runner=self.command_runner,
+                tool_cache=self.tool_cache,
+                **self.scanner_options
+            )
+            
+        # Jobs are planned with this host's tools; workers are expected to
+        # have the same ones installed
+        print("[*] Checking available tools...")
+        needed = sorted({tool for scanner in scanners.values() for tool in scanner.required_tools()})
+        available_tools = self.tool_cache.resolve(needed)
+        
+        pending = {}
+        jobs = []
+        for target, scanner in scanners.items():
+            checks = scanner.scheduled_checks(available_tools)
+            pending[target] = len(checks)
+            jobs.extend(
+                {
+                    'target': target, 'tool': tool, 'scan_type': self.scan_type,
+                    'output_dir': os.path.abspath(scanner.output_dir), 'priority': expected
+                }
+                for expected, tool, check in checks
+            )
+        added = self.queue.enqueue(self.batch, jobs)
+        print(f"[*] Queued {added} jobs ({len(jobs) - added} already queued from an earlier run)")
+        
+        for target, scanner in scanners.items():
+            if not pending[target]:
+                scanner.finish_scan()
+                
+        self.workers = [self._spawn_worker(i) for i in range(self.spawn_workers)]
+        collected = set()
+        cancelled = False
+        try:
+            while any(pending.values()):
+                for job_id, target, tool, status, error in self.queue.finished(self.batch):
+                    if job_id in collected:
+                        continue
+                    collected.add(job_id)
+                    scanner = scanners[target]
+                    if status == 'done':
+                        with scanner._stage('parse.job'):
+                            findings, incomplete = self.queue.findings(job_id)
+                        if incomplete:
+                            print(f"[!] {tool} on {target} did not complete")
+                        scanner._record_check(tool, 'incomplete' if incomplete else 'completed', findings)
+                        scanner.aggregate_results(findings)
+                        scanner._check_fail_fast(findings)
+                    else:
+                        scanner._record_check(tool, status)
+                        if status == 'failed':
+                            print(f"[!] {tool} on {target} failed: {error}")
+                        
+                    pending[target] -= 1
+                    if pending[target] == 0:
+                        scanner.finish_scan()
+                        
+                if self.abort_event.is_set() and not cancelled:
+                    cancelled = True
+                    print(f"[!] Cancelled {self.queue.cancel(self.batch)} queued jobs")
+                if self.metrics is not None:
+                    self.metrics.jobs(self.queue.counts(self.batch))
+                    
+                if any(pending.values()):
+                    self._keep_workers_alive()
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            self._stop_workers()
+            raise
+            
+        self._stop_workers()
+        results = {target: scanner.results for target, scanner in scanners.items()}
+        self._write_batch_summary(list(scanners.values()))
+        
+        if self.abort_event.is_set():
+            reasons = [scanner.abort_reason for scanner in scanners.values() if scanner.abort_reason]
+            raise ScanAborted(reasons[0] if reasons else 'Batch aborted')
+        return results
+        
+    def _stop_workers(self):
+        for worker in self.workers:
+            if worker.poll() is None:
+                worker.terminate()
+        for worker in self.workers:
+            try:
+                worker.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+
+def parse_duration(value: str) -> float:
+    """Seconds from a duration like 90, 90s, 2m or 8h"""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    value = value.strip().lower()
+    try:
+        if value and value[-1] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid duration '{value}', expected e.g. 120, 2m or 8h")
+
+def parse_tool_limits(values: List[str]) -> Dict[str, int]:
+    """Parse repeated TOOL=N arguments into a limits dict"""
+    limits = {}
+    for value in values or []:
+        tool, sep, limit = value.partition('=')
+        if not sep or not limit.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid tool limit '{value}', expected TOOL=N")
+        limits[tool.strip()] = int(limit)
+    return limits
+
+# Options that describe the coordinator's batch rather than how to scan;
+# not passed on to the workers it spawns
+COORDINATOR_OPTIONS = {'targets_file', 'output', 'resume', 'coordinator', 'spawn_workers', 'workers',
+                       'metrics_port', 'metrics_snapshot', 'profile_dump'}
+
+def worker_args(parser: argparse.ArgumentParser, argv: List[str]) -> List[str]:
+    """Scan options from a coordinator's command line for the workers it spawns"""
+    actions = parser._option_string_actions
+    args = []
+    i = 0
+    while i < len(argv):
+        token = argv[i]
+        action = actions.get(token.split('=', 1)[0])
+        takes_value = action is not None and action.nargs != 0 and '=' not in token
+        if action is not None and action.dest not in COORDINATOR_OPTIONS:
+            args.extend(argv[i:i + 2] if takes_value else [token])
+        i += 2 if takes_value else 1
+    return args
 
 def main():
     parser = argparse.ArgumentParser(description='Automated Vulnerability Scanner')
-    parser.add_argument('target', help='Target URL or IP address')
-    parser.add_argument('--scan-type', choices=['quick', 'full'], default='full',
-                       help='Type of scan to perform')
+    parser.add_argument('targets', nargs='*', metavar='target', help='Target URL(s) or IP address(es)')
+    parser.add_argument('--targets-file', help='File with one target per line (batch mode)')
+    parser.add_argument('--scan-type', default='full', metavar='PROFILE',
+                       help='Scan profile: quick, full, or one defined in --profiles')
+    parser.add_argument('--profiles', metavar='FILE',
+                       help='JSON file of scan profiles (tools, args, timeouts, concurrency, cost, value)')
+    parser.add_argument('--time-budget', type=parse_duration, metavar='DURATION',
+                       help='Run the most valuable checks that fit in this time per target (e.g. 120, 2m, 8h)')
     parser.add_argument('--output', help='Custom output directory')
+    parser.add_argument('--resume', metavar='DIR',
+                       help='Resume an interrupted scan or batch from its output directory')
+    parser.add_argument('--workers', type=int, default=8,
+                       help='Size of the shared worker pool in batch mode')
+    parser.add_argument('--per-target', type=int,
+                       help='Maximum concurrent checks against a single target (default: profile\'s, else 4)')
+    parser.add_argument('--tool-limit', action='append', metavar='TOOL=N',
+                       help='Maximum concurrent runs of a tool across all targets (repeatable)')
+    parser.add_argument('--refresh-tool-cache', action='store_true',
+                       help='Ignore cached tool availability probes and re-probe')
+    parser.add_argument('--cache-ttl', type=int, default=0, metavar='SECONDS',
+                       help='Reuse cached tool findings for an unchanged target for this long (0 disables)')
+    parser.add_argument('--build-id',
+                       help='Deployed build identifier used as the target fingerprint for the result cache')
+    parser.add_argument('--fingerprint-header', metavar='HEADER',
+                       help='Extra response header (e.g. X-Build-Id) included in the target fingerprint')
+    parser.add_argument('--diff', action='store_true',
+                       help='Report only new/resolved findings against the stored baseline')
+    parser.add_argument('--update-baseline', action='store_true',
+                       help='Store this scan\'s findings as the baseline for future --diff runs')
+    parser.add_argument('--baseline-dir', help='Directory holding per-target baselines')
+    parser.add_argument('--http-pool-size', type=int, default=10,
+                       help='Keep-alive connections per host for in-process HTTP checks')
+    parser.add_argument('--http-retries', type=int, default=2,
+                       help='Retries for failed in-process HTTP requests')
+    parser.add_argument('--http-backoff', type=float, default=0.5,
+                       help='Exponential backoff factor between HTTP retries (seconds)')
+    parser.add_argument('--sqli-concurrency', type=int, default=8,
+                       help='Concurrent SQL injection probe requests')
+    parser.add_argument('--sqli-rate', type=float, default=10.0,
+                       help='Maximum SQL injection probe requests per second (0 for unlimited)')
+    parser.add_argument('--fail-fast-on', type=str.upper, choices=list(SEVERITY_ORDER),
+                       metavar='SEVERITY',
+                       help='Abort the whole scan on the first finding at or above this severity (e.g. critical)')
+    parser.add_argument('--nuclei-template-ttl', type=float, default=24, metavar='HOURS',
+                       help='Only update nuclei templates if older than this')
+    parser.add_argument('--offline', action='store_true',
+                       help='Never update nuclei templates or check for updates')
+    parser.add_argument('--fuzzer', choices=['auto', 'gobuster', 'native'], default='auto',
+                       help='Directory fuzzer: gobuster, the built-in fuzzer, or gobuster if installed')
+    parser.add_argument('--wordlist', help='Wordlist for directory fuzzing')
+    parser.add_argument('--fuzz-concurrency', type=int,
+                       help='Concurrent connections for the built-in fuzzer (default 10 quick / 50 full)')
+    parser.add_argument('--fuzz-rate', type=float, default=100.0,
+                       help='Starting requests per second for the built-in fuzzer; lowered on 429/503 (0 for unlimited)')
+    parser.add_argument('--path-rules', metavar='FILE',
+                       help='JSON file with extra sensitive-path rules and severity overrides')
+    parser.add_argument('--path-severity', action='append', metavar='PATTERN=SEVERITY',
+                       help='Override the severity of a sensitive-path rule (repeatable)')
+    parser.add_argument('--findings-db', metavar='PATH',
+                       help='Append every scan\'s findings to this SQLite database for history queries')
+    parser.add_argument('--runtime-history', metavar='PATH',
+                       help='File of past tool durations used for scheduling and timeouts '
+                            '(default: in the cache directory)')
+    parser.add_argument('--fixed-timeouts', action='store_true',
+                       help='Use the built-in tool timeouts and order instead of runtime history')
+    parser.add_argument('--no-correlate', action='store_true',
+                       help='Keep findings from different tools separate instead of merging '
+                            'ones with the same CVE, CWE, header or port')
+    parser.add_argument('--host-rate', type=float, default=0, metavar='N',
+                       help='Requests per second per target host, shared by all checks and tools (0 for unlimited)')
+    parser.add_argument('--rate-budgets', metavar='FILE',
+                       help='JSON file of per-environment host budgets, selected with --environment')
+    parser.add_argument('--environment', metavar='NAME',
+                       help='Environment whose budget to use from --rate-budgets')
+    parser.add_argument('--coordinator', metavar='QUEUE',
+                       help='Queue every (target, tool) job in this SQLite file for worker processes '
+                            'and collect their results')
+    parser.add_argument('--worker', metavar='QUEUE',
+                       help='Run as a worker: lease jobs from this queue file until it stays empty')
+    parser.add_argument('--spawn-workers', type=int, default=0, metavar='N',
+                       help='Start N local worker processes with --coordinator')
+    parser.add_argument('--lease', type=float, default=60, metavar='SECONDS',
+                       help='Worker job lease; renewed by heartbeats, re-leased if a worker dies')
+    parser.add_argument('--idle-exit', type=float, default=60, metavar='SECONDS',
+                       help='Stop a worker after the queue has been empty this long (0 never stops)')
+    parser.add_argument('--nmap-workers', type=int, default=1,
+                       help='Parallel nmap processes; >1 shards CIDR ranges and host lists')
+    parser.add_argument('--nmap-shard-size', type=int, default=16,
+                       help='Maximum hosts per nmap shard')
+    parser.add_argument('--nmap-shard-by', choices=['hosts', 'ports'], default='hosts',
+                       help='Split nmap work into host chunks or port chunks')
+    parser.add_argument('--nmap-ports', default='1-65535',
+                       help='Port range split across workers when sharding by ports')
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                       help='Serve live scan metrics in Prometheus format on 127.0.0.1:PORT/metrics '
+                            '(0 picks a free port)')
+    parser.add_argument('--metrics-snapshot', metavar='PATH',
+                       help='Periodically write a JSON snapshot of live scan metrics to this file')
+    parser.add_argument('--metrics-interval', type=float, default=10, metavar='SECONDS',
+                       help='Seconds between metrics snapshots')
+    parser.add_argument('--profile', action='store_true',
+                       help='Time and track allocations of parsing, aggregation and report stages '
+                            'and print a per-stage breakdown at exit')
+    parser.add_argument('--profile-dump', metavar='PATH',
+                       help='Also write cProfile stats of those stages here (pstats format; implies --profile)')
+    parser.add_argument('--profile-no-memory', action='store_true',
+                       help='With --profile, skip tracemalloc allocation tracking (less overhead)')
     
     args = parser.parse_args()
     
-    # Validate target
-    if not args.target.startswith(('http://', 'https://')):
-        # Assume it's an IP or hostname, prepend https://
-        args.target = f"https://{args.target}"
+    targets = list(args.targets)
+    if args.targets_file:
+        targets.extend(load_targets(args.targets_file))
+        
+    # Resuming takes targets, scan type and output directory from the manifest
+    batch_mode = len(targets) > 1 or bool(args.targets_file)
+    if args.resume:
+        batch_manifest = BatchScanner.read_manifest(args.resume)
+        manifest = batch_manifest or ScanCheckpoint.read(args.resume)
+        if not manifest:
+            parser.error(f"no checkpoint or batch manifest found in {args.resume}")
+        targets = manifest['targets'] if batch_manifest else [manifest['target']]
+        args.scan_type = manifest['scan_type']
+        args.output = args.resume
+        batch_mode = bool(batch_manifest)
+        
+    if not targets and not args.worker:
+        parser.error('at least one target or --targets-file is required')
+        
+    # Validate targets, assuming bare IPs or hostnames are https://
+    targets = [normalize_target(t) for t in targets]
+    if args.nmap_workers > 1 and args.nmap_shard_by == 'hosts':
+        for target in targets:
+            try:
+                split_hosts(nmap_host(target), args.nmap_shard_size)
+            except ValueError as e:
+                parser.error(str(e))
+    
+    try:
+        tool_limits = parse_tool_limits(args.tool_limit)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+        
+    severity_overrides = {}
+    for value in args.path_severity or []:
+        pattern, sep, severity = value.rpartition('=')
+        if not sep or severity.upper() not in SEVERITY_ORDER:
+            parser.error(f"Invalid path severity '{value}', expected PATTERN=SEVERITY")
+        severity_overrides[pattern] = severity
+    try:
+        path_classifier = PathClassifier.from_file(args.path_rules, severity_overrides)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"could not load path rules: {e}")
         
-    # Create scanner and run
-    scanner = VulnerabilityScanner(args.target, args.scan_type)
+    try:
+        profiles = ScanProfile.load(args.profiles)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"could not load scan profiles: {e}")
+    if args.scan_type not in profiles:
+        parser.error(f"unknown scan profile '{args.scan_type}' (available: {', '.join(profiles)})")
+    profile = profiles[args.scan_type]
+    args.per_target = args.per_target or profile.concurrency or 4
     
-    if args.output:
-        scanner.output_dir = args.output
-        os.makedirs(scanner.output_dir, exist_ok=True)
+    try:
+        rate_budgets = RateBudgets.from_file(args.rate_budgets, args.environment, args.host_rate)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"could not load rate budgets: {e}")
         
+    command_runner = CommandRunner()
+    tool_cache = ToolProbeCache(command_runner=command_runner, refresh=args.refresh_tool_cache)
+    scanner_options = {
+        'nmap_workers': args.nmap_workers,
+        'nmap_shard_size': args.nmap_shard_size,
+        'nmap_shard_by': args.nmap_shard_by,
+        'nmap_ports': args.nmap_ports,
+        'resume': bool(args.resume),
+        'build_id': args.build_id,
+        'fingerprint_header': args.fingerprint_header,
+        'diff_mode': args.diff,
+        'update_baseline': args.update_baseline,
+        'baseline_dir': args.baseline_dir,
+        'http_client': HTTPClient(
+            pool_size=args.http_pool_size,
+            retries=args.http_retries,
+            backoff=args.http_backoff,
+            budgets=rate_budgets
+        ),
+        'sqli_concurrency': args.sqli_concurrency,
+        'sqli_rate': args.sqli_rate,
+        'fail_fast_on': args.fail_fast_on,
+        'nuclei_templates': NucleiTemplateCache(
+            ttl=int(args.nuclei_template_ttl * 3600), offline=args.offline
+        ),
+        'fuzzer': args.fuzzer,
+        'fuzz_wordlist': args.wordlist,
+        'fuzz_concurrency': args.fuzz_concurrency,
+        'fuzz_rate': args.fuzz_rate,
+        'path_classifier': path_classifier,
+        'correlate': not args.no_correlate,
+        'findings_db': FindingsDatabase(args.findings_db) if args.findings_db else None,
+        'runtime_history': None if args.fixed_timeouts else RuntimeHistory(args.runtime_history),
+        'profile': profile,
+        'time_budget': args.time_budget,
+        'metrics': None,
+        'profiler': StageProfiler(
+            cprofile_path=args.profile_dump, trace_memory=not args.profile_no_memory
+        ) if args.profile or args.profile_dump else None
+    }
+    if args.cache_ttl > 0:
+        result_cache = ResultCache(args.cache_ttl)
+        result_cache.evict_expired()
+        scanner_options['result_cache'] = result_cache
+    reporter = None
+    if args.metrics_port is not None or args.metrics_snapshot:
+        scanner_options['metrics'] = ScanMetrics()
+        try:
+            reporter = MetricsReporter(
+                scanner_options['metrics'], port=args.metrics_port,
+                snapshot_path=args.metrics_snapshot, interval=args.metrics_interval
+            ).start()
+        except OSError as e:
+            parser.error(f"could not serve metrics on port {args.metrics_port}: {e}")
     try:
-        scanner.run_scan()
+        if args.worker:
+            ScanWorker(
+                JobQueue(args.worker), lease=args.lease, idle_exit=args.idle_exit,
+                command_runner=command_runner, tool_cache=tool_cache, profiles=profiles,
+                **scanner_options
+            ).run()
+        elif args.coordinator:
+            coordinator = ScanCoordinator(
+                targets, JobQueue(args.coordinator), args.scan_type, output_dir=args.output,
+                spawn_workers=args.spawn_workers, worker_args=worker_args(parser, sys.argv[1:]),
+                per_target=args.per_target, command_runner=command_runner,
+                tool_cache=tool_cache, **scanner_options
+            )
+            coordinator.run()
+        elif batch_mode:
+            batch = BatchScanner(
+                targets, args.scan_type, output_dir=args.output,
+                max_workers=args.workers, per_target=args.per_target,
+                tool_limits=tool_limits, command_runner=command_runner,
+                tool_cache=tool_cache, **scanner_options
+            )
+            batch.run()
+        else:
+            # Create scanner and run
+            scanner = VulnerabilityScanner(
+                targets[0], args.scan_type, output_dir=args.output,
+                max_concurrent_checks=args.per_target,
+                command_runner=command_runner, tool_cache=tool_cache,
+                **scanner_options
+            )
+            scanner.run_scan()
+    except ScanAborted as e:
+        print(f"\n[!] Scan aborted: {e}")
+        sys.exit(2)
     except KeyboardInterrupt:
         print("\n[!] Scan interrupted by user")
+        command_runner.cancel_all()
         sys.exit(1)
     except Exception as e:
         print(f"\n[!] Scan failed: {e}")
         sys.exit(1)
+    finally:
+        if reporter:
+            reporter.stop()
+        profiler = scanner_options['profiler']
+        if profiler:
+            print(profiler.report())
+            if profiler.dump():
+                print(f"[*] cProfile stats written to {args.profile_dump} "
+                      f"(python -m pstats {args.profile_dump})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file